@@ -1,14 +1,18 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, BackgroundTasks
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, BackgroundTasks, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, StreamingResponse
-from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from fastapi.responses import FileResponse, StreamingResponse, ORJSONResponse, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field
+from typing import Dict, Any, Optional, List
 import sqlite3
 import os
 import time
 import json
+import orjson
 import asyncio
 import uuid
+import hashlib
+import re
 from datetime import datetime, timedelta
 import logging
 from dotenv import load_dotenv
@@ -16,8 +20,13 @@ from dotenv import load_dotenv
 import httpx
 from twelvelabs import TwelveLabs
 from contextlib import asynccontextmanager
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from db_pool import DB_PATH, db_conn
+from functools import lru_cache
+from operator import attrgetter
+from types import SimpleNamespace
 import queue
+import threading
 
 # Load environment variables
 load_dotenv()
@@ -66,6 +75,72 @@ DEFAULT_INDEX_ID = "68d0f9e55705aa622335acb0"  # Recurser Test index (for iterat
 
 # Default to Veo2 (cheaper option)
 DEFAULT_VEO_MODEL = "veo-2.0-generate-001"
+VEO_PROMPT_TEMPLATE = "Generate a high-quality video based on this description: {prompt}. Make it cinematic, realistic, and engaging."
+
+# Gemini prompt templates - built once, without the source indentation of inline f-strings
+PROMPT_REWRITE_TEMPLATE = """\
+You are an expert video generation prompt engineer. Analyze the given prompt and AI detection results to create an improved prompt that will generate higher quality, more realistic videos with fewer AI artifacts.
+
+Original prompt: {original_prompt}
+
+AI Detection Results: {analysis_results}
+
+Create an enhanced prompt that addresses the detected issues and improves video quality. Focus on:
+1. Making the scenario more natural and realistic
+2. Reducing AI-generated artifacts
+3. Improving visual consistency
+4. Adding specific details that make the video more believable
+
+Return only the enhanced prompt, no additional text."""
+
+NEXT_ITERATION_PROMPT_TEMPLATE = """\
+Current iteration: {current_iteration}
+Current confidence: {current_confidence:.1f}%
+Target confidence: {target_confidence:.1f}%
+AI Detection Score: {ai_detection_score:.1f}% (lower is better - 0% means undetectable as AI)
+
+Previous prompt: {current_prompt}
+
+AI Analysis found these indicators: {search_results}
+
+Generate an improved prompt for iteration {next_iteration} that:
+- Reduces AI detection indicators
+- Makes the video appear more natural and realistic
+- Addresses specific artifacts that make it detectable as AI
+- Improves photorealistic quality
+- Adds natural imperfections and organic movement
+
+Focus on making the video UNDETECTABLE as AI-generated.
+Return ONLY the improved prompt.
+"""
+
+ENHANCEMENT_PROMPT_TEMPLATE = """\
+You are analyzing iteration #{iteration_number} of an AI video enhancement process.
+
+Original request: {original_prompt}
+Video ID: {video_id}
+
+This is an AI-generated video that needs enhancement. The video was created using AI generation tools and we need to improve it.
+
+Pegasus Content Analysis:
+{content_description}
+
+Based on this detailed content analysis of the AI-generated video, create an ENHANCED prompt for the next iteration that:
+1. Uses the content description to understand what the AI-generated video actually contains
+2. Identifies specific areas for improvement based on the analysis of the AI-generated content
+3. Maintains the core content but enhances AI generation quality:
+   - Visual quality and coherence (fix AI artifacts)
+   - Cinematography and composition (improve AI camera work)
+   - Lighting and color grading (enhance AI lighting)
+   - Motion smoothness and realism (fix AI motion artifacts)
+   - Subject details and consistency (improve AI subject generation)
+4. Adds specific technical improvements for AI video generation based on the content analysis
+5. Includes version indicator: "Iteration {next_iteration}"
+6. Focuses on making the AI generation more natural and less artificial
+
+Return ONLY the enhanced prompt for AI video generation, no explanations.
+Be specific and detailed about improvements needed for the AI-generated video content.
+"""
 
 # Validate API keys
 if not GEMINI_API_KEY:
@@ -76,31 +151,48 @@ if not TWELVELABS_API_KEY:
     logger.error("❌ TWELVELABS_API_KEY not found in environment variables!")
     TWELVELABS_API_KEY = "MISSING_API_KEY"
 
+@lru_cache(maxsize=8)
+def _tl_client(api_key: str) -> TwelveLabs:
+    """Return a shared TwelveLabs client per API key so HTTP connections are reused"""
+    return TwelveLabs(api_key=api_key)
+
 # Fix for streaming JSON responses from Pegasus API
+def _on_stream_start(data, state):
+    state['id'] = data.get('metadata', {}).get('generation_id')
+
+def _on_text_generation(data, state):
+    state['chunks'].append(data.get('text', ''))
+
+def _on_stream_end(data, state):
+    state['usage'] = data.get('metadata', {}).get('usage')
+
+STREAM_EVENT_HANDLERS = {
+    'stream_start': _on_stream_start,
+    'text_generation': _on_text_generation,
+    'stream_end': _on_stream_end,
+}
+
 def parse_streaming_json(response_text):
     """Parse streaming JSON response and extract the final result"""
-    lines = response_text.strip().split('\n')
-    result_text = ''
-    usage = None
-    generation_id = None
+    # chunks are joined once at the end instead of re-copying on every +=
+    state = {'id': None, 'chunks': [], 'usage': None}
     
-    for line in lines:
-        if line.strip():
-            try:
-                data = json.loads(line)
-                if data.get('event_type') == 'stream_start':
-                    generation_id = data.get('metadata', {}).get('generation_id')
-                elif data.get('event_type') == 'text_generation':
-                    result_text += data.get('text', '')
-                elif data.get('event_type') == 'stream_end':
-                    usage = data.get('metadata', {}).get('usage')
-            except json.JSONDecodeError:
-                continue
+    for line in response_text.splitlines():
+        if not line:
+            continue
+        try:
+            # orjson.JSONDecodeError subclasses json.JSONDecodeError; blank-ish lines land here too
+            data = orjson.loads(line)
+        except json.JSONDecodeError:
+            continue
+        handler = STREAM_EVENT_HANDLERS.get(data.get('event_type'))
+        if handler:
+            handler(data, state)
     
     return {
-        'id': generation_id or 'unknown',
-        'data': result_text,
-        'usage': usage
+        'id': state['id'] or 'unknown',
+        'data': ''.join(state['chunks']),
+        'usage': state['usage']
     }
 
 # Monkey patch httpx to handle streaming JSON
@@ -110,10 +202,10 @@ def patched_json(self, **kwargs):
     try:
         return original_json(self, **kwargs)
     except json.JSONDecodeError as e:
-        if 'Extra data' in str(e):
+        # .msg is the bare reason - no need to format the whole error just to match it
+        if e.msg == 'Extra data':
             return parse_streaming_json(self.text)
-        else:
-            raise e
+        raise
 
 httpx.Response.json = patched_json
 
@@ -137,6 +229,9 @@ class VideoUploadRequest(BaseModel):
     twelvelabs_api_key: str
     gemini_api_key: Optional[str] = None
 
+class BatchStreamRequest(BaseModel):
+    video_ids: List[int] = Field(..., min_length=1, max_length=50)
+
 class VideoResponse(BaseModel):
     success: bool
     message: str
@@ -150,21 +245,49 @@ class VideoStatus(BaseModel):
     video_path: Optional[str] = None
     analysis_results: Optional[Dict[str, Any]] = None
 
+@lru_cache(maxsize=8)
+def _genai_client(api_key: str):
+    """Return a shared Gemini/Veo client per API key - the default key's is built by the startup warm-up"""
+    from google.genai import Client
+    return Client(api_key=api_key)
+
+def _warm_clients():
+    """Build the TwelveLabs and Gemini clients ahead of the first request - failures are only logged"""
+    try:
+        _tl_client(TWELVELABS_API_KEY)
+    except Exception as e:
+        logger.warning(f"⚠️ TwelveLabs client not available for warm-up: {e}")
+    try:
+        _genai_client(GEMINI_API_KEY)
+    except Exception as e:
+        logger.warning(f"⚠️ Gemini client not available for warm-up: {e}")
+
 # Lifespan event handler
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     init_db()
+    log_flush_task = asyncio.create_task(flush_logs_loop())
+    # Overlap SDK start-up cost with serving instead of paying it on the first generation
+    warmup_task = asyncio.create_task(asyncio.to_thread(_warm_clients))
     yield
-    # Shutdown (if needed)
-    pass
+    # Shutdown: the warm-up thread can't be interrupted, so let it finish rather than leave it pending
+    await warmup_task
+    # Stop the flusher and persist whatever is still buffered
+    log_flush_task.cancel()
+    try:
+        await log_flush_task
+    except asyncio.CancelledError:
+        pass
+    flush_pending_logs()
 
 # FastAPI app
 app = FastAPI(
     title="Recurser Validator API",
     description="AI Video Generation with Quality Validation",
     version="2.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware - Allow all origins in production
@@ -177,8 +300,6 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
-# Database setup
-DB_PATH = "recurser_validator.db"
 
 # Progress tracking
 progress_logs = {}
@@ -186,7 +307,91 @@ progress_logs = {}
 # SSE log streaming - store queues for each video_id
 log_streams = defaultdict(list)  # video_id -> list of asyncio.Queue objects
 
-def log_progress(video_id: int, message: str, progress: int = None, status: str = None):
+# Short-lived negative cache for status polls on video ids that don't exist yet
+MISSING_VIDEO_TTL = 1.0  # seconds
+MISSING_VIDEO_CACHE_SIZE = 4096
+missing_video_ids = {}  # video_id -> monotonic expiry time
+
+def remember_missing_video(video_id: int):
+    """Record a not-found video id so rapid polls skip SQLite for a moment"""
+    if len(missing_video_ids) >= MISSING_VIDEO_CACHE_SIZE:
+        missing_video_ids.clear()
+    missing_video_ids[video_id] = time.monotonic() + MISSING_VIDEO_TTL
+
+def is_known_missing_video(video_id: int) -> bool:
+    """Check the negative cache, evicting the entry once it has expired"""
+    expires_at = missing_video_ids.get(video_id)
+    if expires_at is None:
+        return False
+    if expires_at < time.monotonic():
+        missing_video_ids.pop(video_id, None)
+        return False
+    return True
+
+# Buffered detailed_logs writes - log lines are appended in memory and persisted
+# in one transaction per flush instead of one read-modify-write commit per line
+LOG_FLUSH_INTERVAL = 0.1  # seconds
+pending_logs = defaultdict(list)  # video_id -> log entries not yet in the database
+pending_logs_lock = threading.Lock()
+log_flush_lock = threading.Lock()  # held from batch pop to commit, so readers see each entry exactly once
+
+def queue_log_entry(video_id: int, log_entry: str):
+    """Buffer a log entry for the next database flush"""
+    with pending_logs_lock:
+        pending_logs[video_id].append(log_entry)
+
+def get_pending_logs(video_id: int) -> list:
+    """Log entries for a video that have not been flushed yet"""
+    with pending_logs_lock:
+        return list(pending_logs.get(video_id, ()))
+
+def discard_pending_logs():
+    """Drop buffered entries (used when all stored logs are cleared)"""
+    with pending_logs_lock:
+        pending_logs.clear()
+
+def flush_pending_logs():
+    """Append all buffered log entries to videos.detailed_logs in a single commit"""
+    with log_flush_lock:
+        with pending_logs_lock:
+            if not pending_logs:
+                return
+            batch = dict(pending_logs)
+            pending_logs.clear()
+        
+        try:
+            with db_conn() as conn:
+                cursor = conn.cursor()
+                for video_id, entries in batch.items():
+                    cursor.execute("SELECT detailed_logs FROM videos WHERE id = ?", (video_id,))
+                    result = cursor.fetchone()
+                    current_logs = []
+                    if result and result[0]:
+                        try:
+                            current_logs = json.loads(result[0]) if isinstance(result[0], str) else result[0]
+                        except:
+                            current_logs = []
+                    current_logs.extend(entries)
+                    cursor.execute("UPDATE videos SET detailed_logs = ? WHERE id = ?",
+                                  (json.dumps(current_logs), video_id))
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error flushing detailed logs: {e}")
+            # Put the batch back ahead of anything queued since, so the next flush retries it in order
+            with pending_logs_lock:
+                for video_id, entries in batch.items():
+                    pending_logs[video_id][:0] = entries
+
+async def flush_logs_loop():
+    """Background task that persists buffered logs every LOG_FLUSH_INTERVAL"""
+    while True:
+        await asyncio.sleep(LOG_FLUSH_INTERVAL)
+        try:
+            await asyncio.to_thread(flush_pending_logs)
+        except Exception as e:
+            logger.error(f"Log flush loop error: {e}")
+
+async def log_progress(video_id: int, message: str, progress: int = None, status: str = None):
     """Log progress for a video with timestamp and update database"""
     timestamp = time.strftime("%H:%M:%S")
     log_entry = f"[{timestamp}] {message}"
@@ -196,41 +401,26 @@ def log_progress(video_id: int, message: str, progress: int = None, status: str
     
     progress_logs[video_id].append(log_entry)
     
-    # Update database with progress, status, and logs
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Update progress if provided
-    if progress is not None:
-        cursor.execute("UPDATE videos SET progress = ? WHERE id = ?", (progress, video_id))
-    
-    # Update status if provided
-    if status is not None:
-        cursor.execute("UPDATE videos SET status = ? WHERE id = ?", (status, video_id))
-    
-    # Update detailed logs
-    try:
-        # Get current logs from database
-        cursor.execute("SELECT detailed_logs FROM videos WHERE id = ?", (video_id,))
-        result = cursor.fetchone()
-        current_logs = []
-        if result and result[0]:
-            try:
-                current_logs = json.loads(result[0]) if isinstance(result[0], str) else result[0]
-            except:
-                current_logs = []
-        
-        # Add new log entry
-        current_logs.append(log_entry)
-        
-        # Store updated logs
-        cursor.execute("UPDATE videos SET detailed_logs = ? WHERE id = ?", 
-                      (json.dumps(current_logs), video_id))
-    except Exception as e:
-        logger.error(f"Error updating logs: {e}")
+    # Progress and status are awaited (off the event loop) so they land before the caller's next write
+    if progress is not None or status is not None:
+        updates = []
+        params = []
+        
+        # Update progress if provided
+        if progress is not None:
+            updates.append("progress = ?")
+            params.append(progress)
+        
+        # Update status if provided
+        if status is not None:
+            updates.append("status = ?")
+            params.append(status)
+        
+        params.append(video_id)
+        await _execute(f"UPDATE videos SET {', '.join(updates)} WHERE id = ?", tuple(params))
     
-    conn.commit()
-    conn.close()
+    # Detailed logs are persisted by the background flusher
+    queue_log_entry(video_id, log_entry)
     
     logger.info(f"📊 Video {video_id}: {message}")
 
@@ -272,115 +462,416 @@ def log_detailed(video_id: int, message: str, level: str = "INFO"):
         for dead_queue in disconnected_queues:
             log_streams[video_id].remove(dead_queue)
     
-    # Store in database for persistence
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    try:
-        # Get current logs from database
-        cursor.execute("SELECT detailed_logs FROM videos WHERE id = ?", (video_id,))
-        result = cursor.fetchone()
-        current_logs = []
-        if result and result[0]:
-            try:
-                current_logs = json.loads(result[0]) if isinstance(result[0], str) else result[0]
-            except:
-                current_logs = []
-        
-        # Add new log entry
-        current_logs.append(log_entry)
-        
-        # Store updated logs
-        cursor.execute("UPDATE videos SET detailed_logs = ? WHERE id = ?", 
-                      (json.dumps(current_logs), video_id))
-    except Exception as e:
-        logger.error(f"Error updating detailed logs: {e}")
-    
-    conn.commit()
-    conn.close()
+    # Store in database for persistence (batched by the background flusher)
+    queue_log_entry(video_id, log_entry)
+
+_DB_READY = False  # set once the schema has been built in this process
 
 def init_db():
     """Initialize SQLite database with comprehensive schema"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Drop existing tables
-    cursor.execute("DROP TABLE IF EXISTS videos")
-    cursor.execute("DROP TABLE IF EXISTS generation_tasks")
-    cursor.execute("DROP TABLE IF EXISTS analysis_results")
-    
-    # Create videos table with iteration tracking
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS videos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            prompt TEXT NOT NULL,
-            enhanced_prompt TEXT,
-            status TEXT DEFAULT 'pending',
-            video_path TEXT,
-            confidence_threshold REAL DEFAULT 100.0,
-            current_confidence REAL DEFAULT 0.0,
-            progress INTEGER DEFAULT 0,
-            generation_id TEXT,
-            error_message TEXT,
-            index_id TEXT,
-            twelvelabs_video_id TEXT,
-            iteration_count INTEGER DEFAULT 1,
-            max_iterations INTEGER DEFAULT 3,
-            source_video_id TEXT,
-            ai_detection_score REAL DEFAULT 0.0,
-            ai_detection_confidence REAL DEFAULT 0.0,
-            ai_detection_details TEXT,
-            detailed_logs TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    # Create generation_tasks table with iteration tracking
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS generation_tasks (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            video_id INTEGER,
-            iteration_number INTEGER DEFAULT 1,
-            task_type TEXT NOT NULL,
-            status TEXT DEFAULT 'pending',
-            retry_count INTEGER DEFAULT 0,
-            max_retries INTEGER DEFAULT 3,
-            error_message TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (video_id) REFERENCES videos (id)
+    global _DB_READY
+    if _DB_READY:
+        # Already built in this process - a second startup must not drop live data
+        return
+    with db_conn() as conn:
+        cursor = conn.cursor()
+        
+        # Drop existing tables
+        cursor.execute("DROP TABLE IF EXISTS videos")
+        cursor.execute("DROP TABLE IF EXISTS generation_tasks")
+        cursor.execute("DROP TABLE IF EXISTS analysis_results")
+        
+        # Create videos table with iteration tracking
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS videos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                prompt TEXT NOT NULL,
+                enhanced_prompt TEXT,
+                status TEXT DEFAULT 'pending',
+                video_path TEXT,
+                confidence_threshold REAL DEFAULT 100.0,
+                current_confidence REAL DEFAULT 0.0,
+                progress INTEGER DEFAULT 0,
+                generation_id TEXT,
+                error_message TEXT,
+                index_id TEXT,
+                twelvelabs_video_id TEXT,
+                iteration_count INTEGER DEFAULT 1,
+                max_iterations INTEGER DEFAULT 3,
+                source_video_id TEXT,
+                ai_detection_score REAL DEFAULT 0.0,
+                ai_detection_confidence REAL DEFAULT 0.0,
+                ai_detection_details TEXT,
+                detailed_logs TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                hls_url TEXT,
+                hls_status TEXT,
+                hls_thumbnail_urls TEXT,
+                hls_cached_at INTEGER
+            )
+        """)
+        
+        # Create generation_tasks table with iteration tracking
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS generation_tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                video_id INTEGER,
+                iteration_number INTEGER DEFAULT 1,
+                task_type TEXT NOT NULL,
+                status TEXT DEFAULT 'pending',
+                retry_count INTEGER DEFAULT 0,
+                max_retries INTEGER DEFAULT 3,
+                error_message TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (video_id) REFERENCES videos (id)
+            )
+        """)
+        
+        # Create analysis_results table with iteration tracking
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                video_id INTEGER,
+                iteration_number INTEGER DEFAULT 1,
+                search_results TEXT,
+                analysis_results TEXT,
+                quality_score REAL,
+                ai_detection_score REAL,
+                confidence_score REAL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (video_id) REFERENCES videos (id)
+            )
+        """)
+        
+        # Index for "latest analysis for a video" lookups on the status endpoint
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_analysis_video_created
+            ON analysis_results (video_id, created_at DESC)
+        """)
+        
+        # Persisted Pegasus responses - kept across restarts since TwelveLabs video ids are stable
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS pegasus_responses (
+                video_id TEXT NOT NULL,
+                prompt_hash TEXT NOT NULL,
+                temperature REAL NOT NULL,
+                data TEXT,
+                usage TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (video_id, prompt_hash, temperature)
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_pegasus_responses_created_at ON pegasus_responses(created_at)")
+        # Rows written from empty responses hold no analysis text
+        cursor.execute("DELETE FROM pegasus_responses WHERE data IS NULL OR data IN ('', 'None')")
+        
+        # Add detailed_logs column if it doesn't exist (migration)
+        try:
+            cursor.execute("ALTER TABLE videos ADD COLUMN detailed_logs TEXT")
+            conn.commit()
+            logger.info("✅ Added detailed_logs column to videos table")
+        except sqlite3.OperationalError:
+            # Column already exists
+            pass
+        
+        # Add persisted HLS columns if they don't exist (migration)
+        for column, column_type in (("hls_url", "TEXT"), ("hls_status", "TEXT"),
+                                    ("hls_thumbnail_urls", "TEXT"), ("hls_cached_at", "INTEGER")):
+            try:
+                cursor.execute(f"ALTER TABLE videos ADD COLUMN {column} {column_type}")
+                conn.commit()
+                logger.info(f"✅ Added {column} column to videos table")
+            except sqlite3.OperationalError:
+                # Column already exists
+                pass
+        
+        conn.commit()
+    _DB_READY = True
+    logger.info("✅ Database initialized with comprehensive schema")
+
+def _sync_fetchone(sql: str, params: tuple = ()):
+    """Run a read query and return the first row"""
+    with db_conn() as conn:
+        return conn.execute(sql, params).fetchone()
+
+def _sync_fetchall(sql: str, params: tuple = (), row_factory=None):
+    """Run a read query and return all rows"""
+    with db_conn() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = row_factory
+        return cursor.execute(sql, params).fetchall()
+
+def _sync_execute(sql: str, params: tuple = ()):
+    """Run a single write statement and commit"""
+    with db_conn() as conn:
+        conn.execute(sql, params)
+        conn.commit()
+
+def _sync_insert(sql: str, params: tuple = ()) -> int:
+    """Run an INSERT, commit, and return the new row id"""
+    with db_conn() as conn:
+        row_id = conn.execute(sql, params).lastrowid
+        conn.commit()
+        return row_id
+
+def _clear_stored_logs():
+    """Wipe detailed_logs for every video, including entries not flushed yet"""
+    _sync_execute("UPDATE videos SET detailed_logs = NULL")
+    discard_pending_logs()
+
+# Async wrappers so endpoint handlers never block the event loop on disk I/O
+async def _fetchone(sql: str, params: tuple = ()):
+    return await asyncio.to_thread(_sync_fetchone, sql, params)
+
+async def _fetchall(sql: str, params: tuple = (), row_factory=None):
+    return await asyncio.to_thread(_sync_fetchall, sql, params, row_factory)
+
+async def _execute(sql: str, params: tuple = ()):
+    await asyncio.to_thread(_sync_execute, sql, params)
+
+async def _insert(sql: str, params: tuple = ()) -> int:
+    return await asyncio.to_thread(_sync_insert, sql, params)
+
+def _sync_fetchone_with_pending_logs(sql: str, params: tuple, video_id: int):
+    """Read a row and the unflushed log entries as one snapshot (no flush can land in between)"""
+    with log_flush_lock:
+        return _sync_fetchone(sql, params), get_pending_logs(video_id)
+
+async def _fetchone_with_pending_logs(sql: str, params: tuple, video_id: int):
+    return await asyncio.to_thread(_sync_fetchone_with_pending_logs, sql, params, video_id)
+
+# LRU cache of the playback columns looked up by the playback endpoints:
+# (video_path, twelvelabs_video_id, index_id, hls_url, hls_status, hls_thumbnail_urls).
+# Writers of those columns must call invalidate_video_row().
+VIDEO_ROW_CACHE_SIZE = 2048
+video_row_cache = OrderedDict()  # video_id -> playback row
+video_row_cache_lock = threading.Lock()
+video_row_cache_epoch = 0  # bumped on every invalidation so in-flight loads can't store stale rows
+
+def invalidate_video_row(video_id: int):
+    """Drop a cached video row after its path or TwelveLabs ids change"""
+    global video_row_cache_epoch
+    with video_row_cache_lock:
+        video_row_cache.pop(video_id, None)
+        video_row_cache_epoch += 1
+
+def _load_video_row(video_id: int, epoch: int):
+    row = _sync_fetchone("""
+        SELECT video_path, twelvelabs_video_id, index_id, hls_url, hls_status, hls_thumbnail_urls
+        FROM videos WHERE id = ?
+    """, (video_id,))
+    if row is not None:
+        with video_row_cache_lock:
+            if epoch == video_row_cache_epoch:
+                video_row_cache[video_id] = row
+                if len(video_row_cache) > VIDEO_ROW_CACHE_SIZE:
+                    video_row_cache.popitem(last=False)
+    return row
+
+async def get_video_row(video_id: int):
+    """Playback row (video_path, twelvelabs_video_id, index_id, hls_url, hls_status,
+    hls_thumbnail_urls) for a video, or None if it doesn't exist"""
+    with video_row_cache_lock:
+        row = video_row_cache.get(video_id)
+        if row is not None:
+            video_row_cache.move_to_end(video_id)
+            return row
+        epoch = video_row_cache_epoch
+    return await asyncio.to_thread(_load_video_row, video_id, epoch)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB copy buffer for uploaded files
+CONTENT_DIGEST_SIZE = 16  # blake2b digest bytes used as the upload cache key
+
+def _write_bytes(path: str, data: bytes) -> str:
+    """Write a downloaded payload to disk and return its content hash (run via asyncio.to_thread)"""
+    # Raw fd writes skip the buffered file layer; no fsync - the video is regenerable
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        if data and hasattr(os, "posix_fallocate"):
+            try:
+                # Reserve the extents up front so large videos aren't grown piecemeal
+                os.posix_fallocate(fd, 0, len(data))
+            except OSError:
+                pass  # Filesystem doesn't support it - plain writes still work
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    # Hash the bytes already in memory rather than reading the file back later
+    return hashlib.blake2b(data, digest_size=CONTENT_DIGEST_SIZE).hexdigest()
+
+def _save_upload(src, path: str) -> str:
+    """Copy an uploaded file to disk in chunks, hashing it on the way (run via asyncio.to_thread)"""
+    digest = hashlib.blake2b(digest_size=CONTENT_DIGEST_SIZE)
+    with open(path, "wb") as buffer:
+        while chunk := src.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+            buffer.write(chunk)
+    return digest.hexdigest()
+
+# Content-addressed upload cache - re-uploading identical bytes to the same index
+# would only produce a duplicate TwelveLabs video
+UPLOAD_CACHE_SIZE = 128
+uploaded_video_cache = OrderedDict()  # (index_id, content hash) -> TwelveLabs video ID
+
+def _hash_file(path: str) -> str:
+    """blake2b digest of a file, read in chunks (run via asyncio.to_thread)"""
+    digest = hashlib.blake2b(digest_size=CONTENT_DIGEST_SIZE)
+    with open(path, "rb") as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# Pegasus responses per (video, prompt) - the same source video is often re-analyzed
+# with the same fixed prompts across requests; misses fall back to the pegasus_responses table
+PEGASUS_CACHE_SIZE = 128
+pegasus_cache = OrderedDict()  # (video_id, prompt hash, temperature) -> analyze response
+PEGASUS_STORE_MAX_ROWS = 4096
+PEGASUS_STORE_TTL = "-30 days"  # SQLite datetime modifier - older rows are ignored and pruned
+
+def _remember_pegasus_response(key: tuple, response):
+    pegasus_cache[key] = response
+    if len(pegasus_cache) > PEGASUS_CACHE_SIZE:
+        pegasus_cache.popitem(last=False)
+
+def _store_pegasus_response(key: tuple, data: str, usage_json: Optional[str]):
+    """Persist a Pegasus response and prune expired and oldest rows (run via asyncio.to_thread)"""
+    with db_conn() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO pegasus_responses (video_id, prompt_hash, temperature, data, usage) VALUES (?, ?, ?, ?, ?)",
+            (*key, data, usage_json)
         )
-    """)
+        conn.execute("DELETE FROM pegasus_responses WHERE created_at < datetime('now', ?)", (PEGASUS_STORE_TTL,))
+        conn.execute("""
+            DELETE FROM pegasus_responses WHERE rowid NOT IN (
+                SELECT rowid FROM pegasus_responses ORDER BY created_at DESC LIMIT ?
+            )
+        """, (PEGASUS_STORE_MAX_ROWS,))
+        conn.commit()
+
+async def _pegasus_analyze(analyze_client, video_id: str, prompt: str, temperature: float):
+    """Run one Pegasus analyze call, reusing a cached (memory, then SQLite) response when available"""
+    key = (video_id, hashlib.sha1(prompt.encode()).hexdigest(), temperature)
+    response = pegasus_cache.get(key)
+    if response is not None:
+        pegasus_cache.move_to_end(key)
+        return response
     
-    # Create analysis_results table with iteration tracking
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS analysis_results (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            video_id INTEGER,
-            iteration_number INTEGER DEFAULT 1,
-            search_results TEXT,
-            analysis_results TEXT,
-            quality_score REAL,
-            ai_detection_score REAL,
-            confidence_score REAL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (video_id) REFERENCES videos (id)
-        )
-    """)
+    row = await _fetchone(
+        "SELECT data, usage FROM pegasus_responses WHERE video_id = ? AND prompt_hash = ? AND temperature = ?"
+        " AND created_at >= datetime('now', ?)", (*key, PEGASUS_STORE_TTL)
+    )
+    if row and row[0]:
+        usage = json.loads(row[1]) if row[1] else None
+        response = SimpleNamespace(data=row[0], usage=SimpleNamespace(**usage) if usage else None)
+        _remember_pegasus_response(key, response)
+        return response
     
-    # Add detailed_logs column if it doesn't exist (migration)
-    try:
-        cursor.execute("ALTER TABLE videos ADD COLUMN detailed_logs TEXT")
+    response = await asyncio.to_thread(
+        analyze_client.analyze, video_id=video_id, prompt=prompt, temperature=temperature
+    )
+    if response and hasattr(response, 'data'):
+        _remember_pegasus_response(key, response)
+        # Only persist real analysis text - an empty response would be served as "None" later
+        if response.data:
+            usage = getattr(response, 'usage', None)
+            usage_json = json.dumps({
+                field: getattr(usage, field, 0)
+                for field in ('prompt_tokens', 'completion_tokens', 'total_tokens')
+            }) if usage else None
+            data = response.data if isinstance(response.data, str) else str(response.data)
+            try:
+                await asyncio.to_thread(_store_pegasus_response, key, data, usage_json)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not persist Pegasus response: {e}")
+    return response
+
+VEO_POLL_INITIAL = 1.0  # seconds before the first status check
+VEO_POLL_MAX = 10.0  # long generations settle at the old fixed interval
+VEO_POLL_BACKOFF = 1.5
+
+async def _wait_for_veo(client, operation):
+    """Poll a Veo operation until done, backing off so short jobs aren't held for a full interval"""
+    delay = VEO_POLL_INITIAL
+    while not operation.done:
+        await asyncio.sleep(delay)
+        operation = await asyncio.to_thread(client.operations.get, operation)
+        delay = min(delay * VEO_POLL_BACKOFF, VEO_POLL_MAX)
+    return operation
+
+def _mark_video_passed(video_id: int, confidence: float, iteration: int):
+    """Record a passing iteration and return the confidence read back (run via asyncio.to_thread)"""
+    with db_conn() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE videos SET 
+                current_confidence = ?, 
+                iteration_count = ?,
+                status = 'completed',
+                progress = 100,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        """, (confidence, iteration, video_id))
         conn.commit()
-        logger.info("✅ Added detailed_logs column to videos table")
-    except sqlite3.OperationalError:
-        # Column already exists
-        pass
+        # Checkpoint WAL to ensure changes are visible to other connections
+        try:
+            conn.execute("PRAGMA wal_checkpoint")
+        except:
+            pass  # Ignore if WAL not available
+        
+        # Verify the update immediately
+        cursor.execute("SELECT current_confidence FROM videos WHERE id = ?", (video_id,))
+        verify_result = cursor.fetchone()
+        return verify_result[0] if verify_result else None
+
+def _finalize_video_confidence(video_id: int, current_confidence: float) -> Optional[float]:
+    """Mark an iterative run completed without lowering a stored confidence (run via asyncio.to_thread)
     
-    conn.commit()
-    conn.close()
-    logger.info("✅ Database initialized with comprehensive schema")
+    Returns the confidence written, or None when a high stored confidence was left untouched.
+    """
+    # Read current value from DB first to ensure we don't overwrite a higher value
+    with db_conn() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT current_confidence, status FROM videos WHERE id = ?", (video_id,))
+        db_result = cursor.fetchone()
+        
+        if db_result:
+            db_confidence_value = db_result[0] if db_result[0] is not None else None
+            db_status = db_result[1]
+            
+            # If already completed with a HIGH confidence (>=90), don't overwrite
+            # But if confidence is low or missing, we should update
+            if db_status == 'completed' and db_confidence_value is not None and db_confidence_value >= 90.0:
+                logger.info(f"🎯 Video {video_id} already completed with high confidence={db_confidence_value:.1f}%, skipping final update to preserve")
+                return None
+            
+            # Use the maximum of what we calculated vs what's in the database
+            # Prefer our calculated value if it's higher
+            final_confidence = max(current_confidence, db_confidence_value if db_confidence_value else 0.0)
+        else:
+            final_confidence = current_confidence
+        
+        logger.info(f"🎯 Final update: calculated={current_confidence:.1f}%, db={db_result[0] if db_result and db_result[0] is not None else 0.0:.1f}%, using={final_confidence:.1f}%")
+        
+        # Only update if we have a meaningful confidence or status isn't completed
+        cursor.execute("""
+            UPDATE videos SET 
+                status = 'completed',
+                progress = 100,
+                current_confidence = ?,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        """, (final_confidence, video_id))
+        conn.commit()
+        
+        # Verify immediately after commit
+        cursor.execute("SELECT current_confidence FROM videos WHERE id = ?", (video_id,))
+        verify_final = cursor.fetchone()
+        logger.info(f"🎯 Final verification: Database has current_confidence = {verify_final[0] if verify_final else 'NULL'} for video {video_id}")
+    return final_confidence
 
 # Services
 class VideoGenerationService:
@@ -421,24 +912,21 @@ class VideoGenerationService:
             await asyncio.sleep(30)  # Give time for indexing
             
             # Analyze the generated video
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("SELECT twelvelabs_video_id FROM videos WHERE id = ?", (video_id,))
-            result = cursor.fetchone()
-            conn.close()
+            result = await _fetchone("SELECT twelvelabs_video_id FROM videos WHERE id = ?", (video_id,))
             
             if result and result[0]:
                 new_video_id = result[0]
                 
                 # STEP 5: Search and analyze the new video
                 try:
-                    client = TwelveLabs(api_key=twelvelabs_api_key)
+                    client = _tl_client(twelvelabs_api_key)
                     
                     # Run AI detection analysis on the new video
                     logger.info(f"🔍 Running AI detection analysis for iteration {current_iteration}")
                     log_detailed(video_id, f"Running AI detection analysis for iteration {current_iteration}", "INFO")
                     ai_analysis = await AIDetectionService.detect_ai_generation(
-                        index_id, new_video_id, twelvelabs_api_key, database_video_id=video_id
+                        index_id, new_video_id, twelvelabs_api_key, database_video_id=video_id,
+                        confidence_threshold=target_confidence
                     )
                     
                     quality_score = ai_analysis.get('quality_score', 0.0)
@@ -449,16 +937,12 @@ class VideoGenerationService:
                     
                     # Store detailed logs in database
                     if detailed_logs:
-                        conn = sqlite3.connect(DB_PATH)
-                        cursor = conn.cursor()
-                        cursor.execute("""
+                        await _execute("""
                             UPDATE videos SET 
                                 detailed_logs = ?,
                                 updated_at = CURRENT_TIMESTAMP
                             WHERE id = ?
                         """, (json.dumps(detailed_logs), video_id))
-                        conn.commit()
-                        conn.close()
                     
                     # Check if video passes as real (no AI indicators found)
                     if quality_score >= target_confidence:
@@ -470,34 +954,11 @@ class VideoGenerationService:
                         logger.info(f"✅ Setting final confidence to {current_confidence:.1f}% for video {video_id}")
                         
                         # Update database with success - ensure we use the quality_score directly
-                        conn = sqlite3.connect(DB_PATH)
-                        # Ensure writes are immediately visible to other connections
-                        conn.execute("PRAGMA synchronous=NORMAL")
-                        conn.execute("PRAGMA journal_mode=WAL")
-                        cursor = conn.cursor()
                         final_confidence_value = max(quality_score, 100.0)
-                        cursor.execute("""
-                            UPDATE videos SET 
-                                current_confidence = ?, 
-                                iteration_count = ?,
-                                status = 'completed',
-                                progress = 100,
-                                updated_at = CURRENT_TIMESTAMP
-                            WHERE id = ?
-                        """, (final_confidence_value, current_iteration, video_id))
-                        conn.commit()
-                        # Checkpoint WAL to ensure changes are visible to other connections
-                        try:
-                            conn.execute("PRAGMA wal_checkpoint")
-                        except:
-                            pass  # Ignore if WAL not available
-                        
-                        # Verify the update immediately
-                        cursor.execute("SELECT current_confidence FROM videos WHERE id = ?", (video_id,))
-                        verify_result = cursor.fetchone()
-                        verified_value = verify_result[0] if verify_result else None
+                        verified_value = await asyncio.to_thread(
+                            _mark_video_passed, video_id, final_confidence_value, current_iteration
+                        )
                         logger.info(f"✅ Verified: Database now has current_confidence = {verified_value} for video {video_id}")
-                        conn.close()
                         
                         # Set current_confidence to ensure final update uses correct value
                         current_confidence = final_confidence_value
@@ -515,45 +976,30 @@ class VideoGenerationService:
                     log_detailed(video_id, f"📊 Quality Score: {current_confidence:.1f}% (Iteration {current_iteration})", "INFO")
                     
                     # Update database with current confidence
-                    conn = sqlite3.connect(DB_PATH)
-                    cursor = conn.cursor()
-                    cursor.execute("""
+                    await _execute("""
                         UPDATE videos SET 
                             current_confidence = ?, 
                             iteration_count = ?,
                             updated_at = CURRENT_TIMESTAMP
                         WHERE id = ?
                     """, (current_confidence, current_iteration, video_id))
-                    conn.commit()
-                    conn.close()
                     
                     # STEP 6: Generate next iteration prompt if needed
                     if current_confidence < target_confidence and current_iteration < max_iterations:
-                        from google.genai import Client
-                        client = Client(api_key=GEMINI_API_KEY)
-                        
-                        next_prompt = f"""
-                        Current iteration: {current_iteration}
-                        Current confidence: {current_confidence:.1f}%
-                        Target confidence: {target_confidence:.1f}%
-                        AI Detection Score: {ai_detection_score:.1f}% (lower is better - 0% means undetectable as AI)
+                        client = _genai_client(gemini_api_key or GEMINI_API_KEY)
                         
-                        Previous prompt: {current_prompt}
-                        
-                        AI Analysis found these indicators: {ai_analysis.get('search_results', [])}
-                        
-                        Generate an improved prompt for iteration {current_iteration + 1} that:
-                        - Reduces AI detection indicators
-                        - Makes the video appear more natural and realistic
-                        - Addresses specific artifacts that make it detectable as AI
-                        - Improves photorealistic quality
-                        - Adds natural imperfections and organic movement
-                        
-                        Focus on making the video UNDETECTABLE as AI-generated.
-                        Return ONLY the improved prompt.
-                        """
+                        next_prompt = NEXT_ITERATION_PROMPT_TEMPLATE.format(
+                            current_iteration=current_iteration,
+                            current_confidence=current_confidence,
+                            target_confidence=target_confidence,
+                            ai_detection_score=ai_detection_score,
+                            current_prompt=current_prompt,
+                            search_results=ai_analysis.get('search_results', []),
+                            next_iteration=current_iteration + 1
+                        )
                         
-                        response = client.models.generate_content(
+                        response = await asyncio.to_thread(
+                            client.models.generate_content,
                             model='gemini-2.0-flash-exp',
                             contents=next_prompt
                         )
@@ -577,47 +1023,9 @@ class VideoGenerationService:
                 break
         
         # Final status update - ensure current_confidence is preserved
-        # Read current value from DB first to ensure we don't overwrite a higher value
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT current_confidence, status FROM videos WHERE id = ?", (video_id,))
-        db_result = cursor.fetchone()
-        
-        if db_result:
-            db_confidence_value = db_result[0] if db_result[0] is not None else None
-            db_status = db_result[1]
-            
-            # If already completed with a HIGH confidence (>=90), don't overwrite
-            # But if confidence is low or missing, we should update
-            if db_status == 'completed' and db_confidence_value is not None and db_confidence_value >= 90.0:
-                logger.info(f"🎯 Video {video_id} already completed with high confidence={db_confidence_value:.1f}%, skipping final update to preserve")
-                conn.close()
-                return
-            
-            # Use the maximum of what we calculated vs what's in the database
-            # Prefer our calculated value if it's higher
-            final_confidence = max(current_confidence, db_confidence_value if db_confidence_value else 0.0)
-        else:
-            final_confidence = current_confidence
-        
-        logger.info(f"🎯 Final update: calculated={current_confidence:.1f}%, db={db_result[0] if db_result and db_result[0] is not None else 0.0:.1f}%, using={final_confidence:.1f}%")
-        
-        # Only update if we have a meaningful confidence or status isn't completed
-        cursor.execute("""
-            UPDATE videos SET 
-                status = 'completed',
-                progress = 100,
-                current_confidence = ?,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        """, (final_confidence, video_id))
-        conn.commit()
-        
-        # Verify immediately after commit
-        cursor.execute("SELECT current_confidence FROM videos WHERE id = ?", (video_id,))
-        verify_final = cursor.fetchone()
-        logger.info(f"🎯 Final verification: Database has current_confidence = {verify_final[0] if verify_final else 'NULL'} for video {video_id}")
-        conn.close()
+        final_confidence = await asyncio.to_thread(_finalize_video_confidence, video_id, current_confidence)
+        if final_confidence is None:
+            return
         
         logger.info(f"🎯 Iterative generation completed: {current_iteration - 1} iterations, {final_confidence:.1f}% confidence")
     
@@ -630,34 +1038,30 @@ class VideoGenerationService:
         """
         try:
             # Update status to generating
-            log_progress(video_id, f"🎬 Starting Veo2 generation (Iteration {iteration})", 10, "generating")
+            await log_progress(video_id, f"🎬 Starting Veo2 generation (Iteration {iteration})", 10, "generating")
             
             # Generate video with Veo2 (cheaper option)
-            from google.genai import Client
-            client = Client(api_key=GEMINI_API_KEY)
-            operation = client.models.generate_videos(
+            client = _genai_client(gemini_api_key or GEMINI_API_KEY)
+            operation = await asyncio.to_thread(
+                client.models.generate_videos,
                 model=DEFAULT_VEO_MODEL,
-                prompt=f"Generate a high-quality video based on this description: {prompt}. Make it cinematic, realistic, and engaging."
+                prompt=VEO_PROMPT_TEMPLATE.format(prompt=prompt)
             )
             
             logger.info(f"🎬 Using {DEFAULT_VEO_MODEL} model")
-            log_progress(video_id, f"🎬 Using {DEFAULT_VEO_MODEL} model for generation", 15)
+            await log_progress(video_id, f"🎬 Using {DEFAULT_VEO_MODEL} model for generation", 15)
             
             # Poll for completion
-            while not operation.done:
-                # log_progress(video_id, "⏳ Waiting for video generation...", 20)  # Removed repetitive logging
-                # log_detailed(video_id, "Polling Google Veo2 API for generation completion", "INFO")  # Removed repetitive logging
-                await asyncio.sleep(10)
-                operation = client.operations.get(operation)
+            operation = await _wait_for_veo(client, operation)
             
-            log_progress(video_id, "✅ Video generation completed", 30)
+            await log_progress(video_id, "✅ Video generation completed", 30)
             log_detailed(video_id, "Video generation completed successfully", "SUCCESS")
             
             # Download video
-            log_progress(video_id, "📥 Downloading generated video", 40)
+            await log_progress(video_id, "📥 Downloading generated video", 40)
             log_detailed(video_id, "Downloading generated video from Google Veo2", "INFO")
             generated_video = operation.response.generated_videos[0]
-            video_data = client.files.download(file=generated_video.video)
+            video_data = await asyncio.to_thread(client.files.download, file=generated_video.video)
             
             # Save video temporarily for upload (will be deleted after TwelveLabs upload)
             timestamp = int(time.time())
@@ -666,24 +1070,23 @@ class VideoGenerationService:
             video_path = os.path.join("uploads", video_filename)
             os.makedirs("uploads", exist_ok=True)
             
-            with open(video_path, "wb") as f:
-                f.write(video_data)
+            content_hash = await asyncio.to_thread(_write_bytes, video_path, video_data)
             
             log_detailed(video_id, f"Video temporarily saved for upload: {video_filename}", "INFO")
             
             # STEP 3: Upload to TwelveLabs test index with version indicator
-            log_progress(video_id, f"📤 Uploading video to TwelveLabs test index (Iteration {iteration})", 50, "uploading")
-            twelvelabs_video_id = await VideoGenerationService.upload_to_twelvelabs(video_path, index_id, twelvelabs_api_key, video_id, iteration)
+            await log_progress(video_id, f"📤 Uploading video to TwelveLabs test index (Iteration {iteration})", 50, "uploading")
+            twelvelabs_video_id = await VideoGenerationService.upload_to_twelvelabs(
+                video_path, index_id, twelvelabs_api_key, video_id, iteration, content_hash=content_hash
+            )
             
             # Check for usage limit
             if twelvelabs_video_id == "USAGE_LIMIT_EXCEEDED":
                 logger.warning("⚠️ TwelveLabs usage limit reached - skipping analysis")
-                log_progress(video_id, "⚠️ TwelveLabs usage limit reached - video saved locally", 90, "completed")
+                await log_progress(video_id, "⚠️ TwelveLabs usage limit reached - video saved locally", 90, "completed")
                 
                 # Update status to completed without analysis
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                cursor.execute("""
+                await _execute("""
                     UPDATE videos SET 
                         status = ?, 
                         progress = ?, 
@@ -696,8 +1099,7 @@ class VideoGenerationService:
                 """, ("completed", 100, video_path, 
                       json.dumps({"error": "TwelveLabs usage limit reached - analysis skipped"}),
                       video_id))
-                conn.commit()
-                conn.close()
+                invalidate_video_row(video_id)
                 
                 return {
                     "video_id": video_id,
@@ -708,18 +1110,17 @@ class VideoGenerationService:
                 }
             
             # Update status to analyzing
-            log_progress(video_id, "🔍 Starting AI detection analysis", 60, "analyzing")
+            await log_progress(video_id, "🔍 Starting AI detection analysis", 60, "analyzing")
             
             # Update database with video path and twelvelabs ID
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
             # Store video path for display (will be cleaned up later if not final)
-            cursor.execute("""
-                UPDATE videos SET video_path = ?, twelvelabs_video_id = ?, updated_at = CURRENT_TIMESTAMP 
+            await _execute("""
+                UPDATE videos SET video_path = ?, twelvelabs_video_id = ?,
+                    hls_url = NULL, hls_status = NULL, hls_thumbnail_urls = NULL, hls_cached_at = NULL,
+                    updated_at = CURRENT_TIMESTAMP 
                 WHERE id = ?
             """, (video_path, twelvelabs_video_id, video_id))
-            conn.commit()
-            conn.close()
+            invalidate_video_row(video_id)
             
             log_detailed(video_id, f"Video uploaded to TwelveLabs: {twelvelabs_video_id}", "SUCCESS")
             log_detailed(video_id, f"TwelveLabs ID: {twelvelabs_video_id}", "INFO")
@@ -730,7 +1131,7 @@ class VideoGenerationService:
             # Skip analysis if this is part of iterative process (iterative process handles its own analysis)
             if skip_analysis:
                 logger.info(f"⏭️ Skipping analysis in generate_video - will be handled by iterative process")
-                log_progress(video_id, "⏭️ Analysis will be performed by iterative process", 65)
+                await log_progress(video_id, "⏭️ Analysis will be performed by iterative process", 65)
                 return {
                     "video_id": video_id,
                     "status": "generated",
@@ -741,7 +1142,7 @@ class VideoGenerationService:
             
             # Run AI detection with detailed logging
             try:
-                log_progress(video_id, "🔍 Searching for AI indicators with Marengo", 65)
+                await log_progress(video_id, "🔍 Searching for AI indicators with Marengo", 65)
                 ai_analysis = await AIDetectionService.detect_ai_generation(
                     index_id, twelvelabs_video_id, twelvelabs_api_key, database_video_id=video_id
                 )
@@ -750,14 +1151,12 @@ class VideoGenerationService:
                 quality_score = ai_analysis.get('quality_score', 0.0)
                 detailed_logs = ai_analysis.get('detailed_logs', [])
                 
-                log_progress(video_id, f"🤖 AI Detection Score: {ai_detection_score:.1f}%", 70)
-                log_progress(video_id, f"📊 Quality Score: {quality_score:.1f}%", 75)
+                await log_progress(video_id, f"🤖 AI Detection Score: {ai_detection_score:.1f}%", 70)
+                await log_progress(video_id, f"📊 Quality Score: {quality_score:.1f}%", 75)
                 
                 # Store detailed logs in database
                 if detailed_logs:
-                    conn = sqlite3.connect(DB_PATH)
-                    cursor = conn.cursor()
-                    cursor.execute("""
+                    await _execute("""
                         UPDATE videos SET 
                             detailed_logs = ?,
                             ai_detection_score = ?,
@@ -765,15 +1164,13 @@ class VideoGenerationService:
                             updated_at = CURRENT_TIMESTAMP
                         WHERE id = ?
                     """, (json.dumps(detailed_logs), ai_detection_score, max(0, 100 - ai_detection_score), video_id))
-                    conn.commit()
-                    conn.close()
                 
                 # Check if video passes as real (no AI indicators found)
                 if ai_detection_score == 0:
                     logger.info(f"🎉 SUCCESS! Video passes as real - No AI indicators detected")
                     current_confidence = 100.0
                     
-                    log_progress(video_id, "🎉 SUCCESS! Video passes as real - No AI indicators detected", 100, "completed")
+                    await log_progress(video_id, "🎉 SUCCESS! Video passes as real - No AI indicators detected", 100, "completed")
                     
                     return {
                         "video_id": video_id,
@@ -790,100 +1187,114 @@ class VideoGenerationService:
                 detailed_logs = [f"❌ AI detection failed: {str(e)}"]
             
             # Generate enhanced prompts using Gemini
-            log_progress(video_id, "🔧 Generating enhanced prompts with Gemini", 80)
+            await log_progress(video_id, "🔧 Generating enhanced prompts with Gemini", 80)
             try:
-                enhanced_prompt = await PromptEnhancementService.enhance_prompt(prompt, {})
+                enhanced_prompt = await PromptEnhancementService.enhance_prompt(prompt, {}, gemini_api_key)
                 logger.info(f"✅ Enhanced prompt generated: {enhanced_prompt[:100]}...")
                 
                 # Store enhanced prompt
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                cursor.execute("""
+                await _execute("""
                     UPDATE videos SET enhanced_prompt = ?, updated_at = CURRENT_TIMESTAMP 
                     WHERE id = ?
                 """, (enhanced_prompt, video_id))
-                conn.commit()
-                conn.close()
                 
             except Exception as prompt_error:
                 logger.warning(f"⚠️ Prompt enhancement failed: {str(prompt_error)}")
                 enhanced_prompt = prompt  # Use original prompt as fallback
             
             # Final completion
-            log_progress(video_id, "✅ AI detection analysis completed", 100, "completed")
+            await log_progress(video_id, "✅ AI detection analysis completed", 100, "completed")
             
             logger.info(f"✅ Video generation and analysis completed for video {video_id}")
             
         except Exception as e:
             logger.error(f"❌ Video generation error: {str(e)}")
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("""
+            await _execute("""
                 UPDATE videos SET status = ?, error_message = ?, updated_at = CURRENT_TIMESTAMP 
                 WHERE id = ?
             """, ("failed", str(e), video_id))
-            conn.commit()
-            conn.close()
     
     @staticmethod
-    async def upload_to_twelvelabs(video_path: str, index_id: str, api_key: str, video_id: int, iteration: int = 1):
-        """Upload video to TwelveLabs for indexing with version tracking"""
+    async def upload_to_twelvelabs(video_path: str, index_id: str, api_key: str, video_id: int, iteration: int = 1,
+                                   content_hash: Optional[str] = None):
+        """Upload video to TwelveLabs for indexing with version tracking
+        
+        Args:
+            content_hash: blake2b digest computed while the file was written; hashed from disk if omitted
+        """
         try:
             logger.info(f"📤 Uploading video iteration {iteration} to TwelveLabs index {index_id}")
             log_detailed(video_id, f"Uploading video iteration {iteration} to TwelveLabs index {index_id}", "INFO")
             
-            client = TwelveLabs(api_key=api_key)
+            client = _tl_client(api_key)
             
-            # Upload video using the correct SDK method (task.create)
-            with open(video_path, "rb") as f:
-                task_response = client.tasks.create(
-                    index_id=index_id,
-                    video_file=f
+            # Skip the upload entirely if these exact bytes are already in the index
+            upload_key = (index_id, content_hash or await asyncio.to_thread(_hash_file, video_path))
+            twelvelabs_video_id = uploaded_video_cache.get(upload_key)
+            if twelvelabs_video_id:
+                uploaded_video_cache.move_to_end(upload_key)
+                logger.info(f"♻️ Identical video already indexed as {twelvelabs_video_id} - skipping upload")
+                log_detailed(video_id, f"Identical video already indexed in TwelveLabs ({twelvelabs_video_id}) - reusing it", "INFO")
+            else:
+                # Upload video using the correct SDK method (task.create)
+                def create_task():
+                    with open(video_path, "rb") as f:
+                        return client.tasks.create(
+                            index_id=index_id,
+                            video_file=f
+                        )
+                task_response = await asyncio.to_thread(create_task)
+            
+                # Wait for task completion and get video ID
+                task_id = task_response.id
+                logger.info(f"📋 Task created: {task_id}")
+                log_detailed(video_id, f"TwelveLabs task created with ID: {task_id}", "SUCCESS")
+            
+                # STEP 4: Wait for complete indexing before next iteration
+                await log_progress(video_id, f"⏳ Waiting for video indexing (Iteration {iteration})", 55)
+                log_detailed(video_id, f"Waiting for TwelveLabs indexing to complete (Iteration {iteration})", "INFO")
+                # wait_for_done runs in a worker thread - hand the log line back to the event loop,
+                # which owns progress_logs and the SSE queues
+                loop = asyncio.get_running_loop()
+                def indexing_callback(task):
+                    status_msg = f"⏳ Indexing status: {task.status}"
+                    logger.info(status_msg)
+                    loop.call_soon_threadsafe(log_detailed, video_id, status_msg, "INFO")
+            
+                completed_task = await asyncio.to_thread(
+                    client.tasks.wait_for_done,
+                    task_id=task_id,
+                    sleep_interval=5.0,
+                    callback=indexing_callback
                 )
             
-            # Wait for task completion and get video ID
-            task_id = task_response.id
-            logger.info(f"📋 Task created: {task_id}")
-            log_detailed(video_id, f"TwelveLabs task created with ID: {task_id}", "SUCCESS")
-            
-            # STEP 4: Wait for complete indexing before next iteration
-            log_progress(video_id, f"⏳ Waiting for video indexing (Iteration {iteration})", 55)
-            log_detailed(video_id, f"Waiting for TwelveLabs indexing to complete (Iteration {iteration})", "INFO")
-            def indexing_callback(task):
-                status_msg = f"⏳ Indexing status: {task.status}"
-                logger.info(status_msg)
-                log_detailed(video_id, status_msg, "INFO")
-            
-            completed_task = client.tasks.wait_for_done(
-                task_id=task_id,
-                sleep_interval=5.0,
-                callback=indexing_callback
-            )
-            
-            if completed_task.status == "ready":
-                # Get the video ID from the completed task
-                twelvelabs_video_id = getattr(completed_task, 'video_id', None)
-                if not twelvelabs_video_id:
-                    # Try alternative attribute names
-                    twelvelabs_video_id = getattr(completed_task, 'id', None)
+                if completed_task.status == "ready":
+                    # Get the video ID from the completed task
+                    twelvelabs_video_id = getattr(completed_task, 'video_id', None)
                     if not twelvelabs_video_id:
-                        # Use task ID as fallback
-                        twelvelabs_video_id = task_id
-                        logger.warning(f"⚠️ Using task ID as video ID: {twelvelabs_video_id}")
+                        # Try alternative attribute names
+                        twelvelabs_video_id = getattr(completed_task, 'id', None)
+                        if not twelvelabs_video_id:
+                            # Use task ID as fallback
+                            twelvelabs_video_id = task_id
+                            logger.warning(f"⚠️ Using task ID as video ID: {twelvelabs_video_id}")
                 
-                logger.info(f"✅ Task completed successfully: {twelvelabs_video_id}")
-            else:
-                raise Exception(f"Task failed with status: {completed_task.status}")
+                    logger.info(f"✅ Task completed successfully: {twelvelabs_video_id}")
+                else:
+                    raise Exception(f"Task failed with status: {completed_task.status}")
+            
+                uploaded_video_cache[upload_key] = twelvelabs_video_id
+                if len(uploaded_video_cache) > UPLOAD_CACHE_SIZE:
+                    uploaded_video_cache.popitem(last=False)
             
             # Update video with TwelveLabs video ID
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE videos SET twelvelabs_video_id = ?, updated_at = CURRENT_TIMESTAMP 
+            await _execute("""
+                UPDATE videos SET twelvelabs_video_id = ?,
+                    hls_url = NULL, hls_status = NULL, hls_thumbnail_urls = NULL, hls_cached_at = NULL,
+                    updated_at = CURRENT_TIMESTAMP 
                 WHERE id = ?
             """, (twelvelabs_video_id, video_id))
-            conn.commit()
-            conn.close()
+            invalidate_video_row(video_id)
             
             logger.info(f"✅ Video uploaded to TwelveLabs: {twelvelabs_video_id}")
             
@@ -903,15 +1314,107 @@ class VideoGenerationService:
             # Re-raise other errors
             raise e
 
+PEGASUS_MAX_PENALTY = 50  # most a Pegasus analysis can take off the quality score
+
+def _dedupe_category_queries(categories: Dict[str, str]) -> Dict[str, str]:
+    """Drop query phrases already covered by an earlier category so no search is paid for twice"""
+    seen = set()
+    deduped = {}
+    for category, query_text in categories.items():
+        phrases = []
+        for phrase in query_text.split(","):
+            phrase = phrase.strip()
+            if phrase and phrase.lower() not in seen:
+                seen.add(phrase.lower())
+                phrases.append(phrase)
+        if phrases:
+            deduped[category] = ", ".join(phrases)
+    return deduped
+
+# Batch queries into categories for more efficient searching - built once at import
+AI_DETECTION_CATEGORIES = _dedupe_category_queries({
+    "facial_artifacts": "unnatural facial symmetry, artificial facial proportions, synthetic facial structure, unnatural eye movements, artificial skin texture, robotic facial expressions",
+    
+    "motion_artifacts": "jerky movements, unnatural motion blur, artificial motion smoothing, synthetic frame transitions, mechanical object tracking, temporal inconsistencies",
+    
+    "lighting_artifacts": "inconsistent lighting, artificial shadow patterns, unnatural light sources, synthetic illumination, artificial ambient lighting",
+    
+    "audio_artifacts": "robotic speech patterns, artificial voice modulation, synthetic intonation, unnatural speech rhythm, artificial pronunciation",
+    
+    "environmental_artifacts": "inconsistent environmental details, artificial background elements, synthetic scene composition, unnatural object placement, impossible physics scenarios",
+    
+    "ai_generation_artifacts": "GAN artifacts, diffusion model artifacts, deep learning artifacts, machine learning artifacts, AI generation artifacts, artificial compression patterns",
+    
+    "behavioral_artifacts": "cat drinking tea, animals doing human activities, impossible animal behavior, unnatural animal interactions, synthetic animal movements",
+    
+    "quality_artifacts": "inconsistent video quality, artificial quality patterns, synthetic quality variations",
+    
+    "texture_artifacts": "artificial texture patterns, synthetic material properties, unnatural surface details, artificial fabric textures, synthetic skin textures",
+    
+    "color_artifacts": "unnatural color saturation, artificial color grading, synthetic color palettes, unnatural color transitions, artificial color consistency",
+    
+    "perspective_artifacts": "impossible perspective angles, artificial depth perception, synthetic 3D rendering, unnatural camera angles, artificial spatial relationships",
+    
+    "temporal_artifacts": "unnatural time progression, artificial frame rates, synthetic temporal consistency, unnatural scene transitions, artificial pacing",
+    
+    "composition_artifacts": "artificial scene composition, synthetic framing, unnatural visual balance, artificial rule of thirds, synthetic visual hierarchy",
+    
+    "detail_artifacts": "artificial fine details, synthetic micro-movements, unnatural precision, artificial sharpness, synthetic clarity patterns",
+    
+    "interaction_artifacts": "unnatural object interactions, artificial physics, synthetic collision detection, unnatural gravity effects, artificial material responses"
+})
+
+# Pegasus prompts, built once - the content prompts describe a video for the next
+# iteration, the detection prompts look for AI generation indicators
+PEGASUS_CONTENT_PROMPTS = (
+    "Analyze this AI-generated video and provide a detailed content description. This video was created using AI generation tools and our goal is to enhance it. Include: VISUAL ELEMENTS - Describe all visible objects, people, animals, and environments. Describe colors, lighting, composition, and visual style. Describe camera movements, angles, and cinematography. Describe any text, signs, or written content. MOTION AND ACTION - Describe all movements, actions, and activities happening in the video. Describe the pace and rhythm of the video. Describe any interactions between subjects. Describe any changes in the scene over time. AUDIO ELEMENTS - Describe any sounds, music, speech, or audio content. Describe the mood and atmosphere created by audio. Describe any dialogue or narration. EMOTIONAL AND NARRATIVE CONTENT - Describe the mood, tone, and emotional content. Describe any story or narrative elements. Describe the overall message or purpose of the video. Describe the target audience or context. Focus on identifying areas that could be improved in the next AI generation iteration.",
+    
+    "Provide a comprehensive technical and artistic analysis of this AI-generated video. This video was created using AI tools and we need to enhance it. Include: TECHNICAL QUALITY - Assess video resolution, clarity, and technical quality. Describe camera work, framing, and cinematography techniques. Assess lighting, color grading, and visual effects. Describe audio quality and sound design. ARTISTIC ELEMENTS - Describe the visual style, aesthetic, and artistic choices. Describe the composition and visual balance. Describe the use of color, contrast, and visual elements. Describe the overall artistic vision and execution. CONTENT ANALYSIS - Describe the main subject matter and themes. Describe the setting, environment, and context. Describe any characters, people, or subjects. Describe the overall content and purpose of the video. Identify specific areas where the AI generation could be improved in the next iteration."
+)
+
+PEGASUS_DETECTION_PROMPTS = (
+    "Perform a detailed visual analysis of this video to detect AI generation indicators. Focus on: FACIAL FEATURES - Analyze facial symmetry for unnatural perfection, examine eye movements for mechanical patterns, check skin texture for artificial smoothness, look for inconsistent facial proportions. MOVEMENT PATTERNS - Identify robotic or mechanical movements, check for unnatural motion fluidity, examine gesture timing for artificial precision, look for impossible or physics-defying actions. VISUAL ARTIFACTS - Detect inconsistent lighting and shadows, identify artificial texture patterns, look for rendering artifacts and compression issues, check for unnatural color gradients and reflections. ENVIRONMENTAL CONSISTENCY - Analyze object placement and interactions, check for impossible scenarios or physics violations, examine depth of field and perspective accuracy, look for temporal inconsistencies. IMPOSSIBLE SCENARIOS - Look for animals doing human activities, impossible physics, unnatural object behavior, or scenarios that defy logic. Provide specific timestamps and confidence levels for each detected indicator.",
+    
+    "Conduct a technical analysis of this video to identify AI generation artifacts. Examine: GENERATION ARTIFACTS - Look for GAN, diffusion model, or neural network artifacts, identify compression and encoding anomalies, check for artificial noise patterns and filtering, detect synthetic pixelation and color bleeding. AUDIO ANALYSIS - Analyze speech patterns for robotic characteristics, check for artificial voice modulation and intonation, examine audio-visual synchronization issues, look for synthetic background noise patterns. RENDERING QUALITY - Assess overall rendering consistency, check for artificial sharpness or blur, identify unnatural material properties, look for synthetic lighting and shadow patterns. TECHNICAL INDICATORS - Detect model-specific artifacts (Stable Diffusion, DALL-E, etc.), identify deep learning generation signatures, check for artificial processing patterns, look for neural network training artifacts. CREATIVE INDICATORS - Look for AI-generated artistic content, synthetic creative expressions, artificial creative patterns, or generated media content. Rate the likelihood of AI generation from 1-10 with detailed evidence.",
+    
+    "Analyze this video for contextual and behavioral indicators of AI generation. Evaluate: BEHAVIORAL PATTERNS - Examine human behavior for unnatural consistency, check for mechanical or robotic mannerisms, analyze emotional expressions for artificial patterns, look for unrealistic social interactions. NARRATIVE CONSISTENCY - Check story flow for artificial progression, examine cause-and-effect relationships, look for impossible or illogical scenarios, analyze temporal consistency and pacing. ENVIRONMENTAL LOGIC - Verify physical laws and natural phenomena, check for impossible object interactions, examine weather and environmental consistency, look for artificial world-building elements. CONTEXTUAL ANOMALIES - Identify elements that don't fit the scene, check for anachronistic or impossible details, examine cultural and social context accuracy, look for artificial narrative elements. IMPOSSIBLE SCENARIOS - Look for animals doing human activities, impossible physics, unnatural object behavior, or scenarios that defy logic. CREATIVE INDICATORS - Check for AI-generated creative content, synthetic artistic expressions, artificial creative patterns, or generated media content. Provide specific examples with timestamps and rate overall AI generation likelihood."
+)
+
+MARENGO_SEARCH_OPTIONS = ["visual", "audio"]
+
+# Marengo indicator sweeps per (index_id, video_id) - one paid search per category
+SEARCH_RESULTS_CACHE_SIZE = 128
+search_results_cache = OrderedDict()  # (index_id, video_id) -> list of search results
+
+# Phrases in an analysis that count as a quality issue, matched in a single regex pass
+QUALITY_ISSUE_RE = re.compile("|".join(map(re.escape, [
+    'poor quality', 'low quality', 'artificial', 'synthetic',
+    'rendering artifacts', 'compression issues', 'blurry',
+    'inconsistent', 'unnatural', 'mechanical', 'robotic'
+])), re.IGNORECASE)
+
+# Phrases in an analysis that indicate AI generation
+AI_INDICATOR_RE = re.compile("|".join(map(re.escape, [
+    'ai generated', 'artificial', 'synthetic', 'generated by',
+    'neural network', 'machine learning', 'deepfake', 'fake',
+    'unnatural', 'robotic', 'mechanical', 'artificial intelligence'
+])), re.IGNORECASE)
+
 class AIDetectionService:
     @staticmethod
-    async def detect_ai_generation(index_id: str, video_id: str, api_key: str, database_video_id: int = None):
-        """Detect AI generation using Marengo and Pegasus with detailed logging"""
+    async def detect_ai_generation(index_id: str, video_id: str, api_key: str, database_video_id: int = None,
+                                   confidence_threshold: float = None):
+        """Detect AI generation using Marengo and Pegasus with detailed logging
+        
+        Args:
+            confidence_threshold: If given, Pegasus is skipped when the Marengo score alone
+                already decides whether the video passes
+        """
         try:
             logger.info(f"🔍 Starting AI detection for video {video_id}")
             log_detailed(video_id, f"Starting AI detection analysis for video {video_id}", "INFO")
             
-            client = TwelveLabs(api_key=api_key)
+            client = _tl_client(api_key)
             search_client = client.search
             # Debug: Let's see what methods are available on the client
             logger.info(f"🔍 TwelveLabs client available attributes: {[attr for attr in dir(client) if not attr.startswith('_')]}")
@@ -958,10 +1461,20 @@ class AIDetectionService:
                     "detailed_logs": detailed_logs
                 }
             
-            # Pegasus analysis with detailed logging (only if searches found indicators)
-            analysis_results = await AIDetectionService._analyze_with_pegasus(
-                analyze_client, video_id
-            )
+            # Cascade: Pegasus can only lower the score, by at most PEGASUS_MAX_PENALTY.
+            # If the video passes even after the maximum penalty, skip the expensive call.
+            # A failing verdict still needs the full score (and the analysis feeds the next prompt).
+            if confidence_threshold is not None and (
+                preliminary_quality_score - PEGASUS_MAX_PENALTY >= confidence_threshold
+            ):
+                logger.info(f"⏭️ Skipping Pegasus - Marengo score {preliminary_quality_score:.1f}% passes the {confidence_threshold}% threshold even after the maximum Pegasus penalty")
+                log_detailed(video_id, f"Skipping Pegasus analysis - Marengo score alone passes the {confidence_threshold}% threshold", "INFO")
+                analysis_results = []
+            else:
+                # Pegasus analysis with detailed logging (only if searches found indicators)
+                analysis_results = await AIDetectionService._analyze_with_pegasus(
+                    analyze_client, video_id
+                )
             
             # Calculate single quality score (0-100, higher = better)
             # If we have no search results and no analysis results indicating problems, quality is 100%
@@ -971,11 +1484,9 @@ class AIDetectionService:
             # If we exited early and have 0 indicators, we can be confident it's 100%
             if len(search_results) == 0 and database_video_id:
                 # Check if searches were stopped early due to completion
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                cursor.execute("SELECT status, current_confidence FROM videos WHERE id = ?", (database_video_id,))
-                status_check = cursor.fetchone()
-                conn.close()
+                status_check = await _fetchone(
+                    "SELECT status, current_confidence FROM videos WHERE id = ?", (database_video_id,)
+                )
                 
                 if status_check and status_check[0] == 'completed' and status_check[1] and status_check[1] >= 100.0:
                     # Use the already-set confidence since video completed early
@@ -1009,100 +1520,88 @@ class AIDetectionService:
         """Search for AI indicators using Marengo - optimized with batched queries"""
         # Check if video is already completed - skip searches if so
         if early_exit_video_id:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("SELECT status, current_confidence FROM videos WHERE id = ?", (early_exit_video_id,))
-            status_check = cursor.fetchone()
-            conn.close()
+            status_check = await _fetchone(
+                "SELECT status, current_confidence FROM videos WHERE id = ?", (early_exit_video_id,)
+            )
             
             if status_check and status_check[0] == 'completed' and status_check[1] and status_check[1] >= 100.0:
                 logger.info(f"⏭️ Skipping remaining searches - video {early_exit_video_id} already completed with {status_check[1]}% confidence")
                 return []
         
-        # Batch queries into categories for more efficient searching
-        ai_detection_categories = {
-            "facial_artifacts": "unnatural facial symmetry, artificial facial proportions, synthetic facial structure, unnatural eye movements, artificial skin texture, robotic facial expressions",
-            
-            "motion_artifacts": "jerky movements, unnatural motion blur, artificial motion smoothing, synthetic frame transitions, mechanical object tracking, temporal inconsistencies",
-            
-            "lighting_artifacts": "inconsistent lighting, artificial shadow patterns, unnatural light sources, synthetic illumination, artificial ambient lighting",
-            
-            "audio_artifacts": "robotic speech patterns, artificial voice modulation, synthetic intonation, unnatural speech rhythm, artificial pronunciation",
-            
-            "environmental_artifacts": "inconsistent environmental details, artificial background elements, synthetic scene composition, unnatural object placement, impossible physics scenarios",
-            
-            "ai_generation_artifacts": "GAN artifacts, diffusion model artifacts, deep learning artifacts, machine learning artifacts, AI generation artifacts, artificial compression patterns",
-            
-            "behavioral_artifacts": "cat drinking tea, animals doing human activities, impossible animal behavior, unnatural animal interactions, synthetic animal movements",
-            
-            "quality_artifacts": "inconsistent video quality, artificial quality patterns, synthetic quality variations",
-            
-            "texture_artifacts": "artificial texture patterns, synthetic material properties, unnatural surface details, artificial fabric textures, synthetic skin textures",
-            
-            "color_artifacts": "unnatural color saturation, artificial color grading, synthetic color palettes, unnatural color transitions, artificial color consistency",
-            
-            "perspective_artifacts": "impossible perspective angles, artificial depth perception, synthetic 3D rendering, unnatural camera angles, artificial spatial relationships",
-            
-            "temporal_artifacts": "unnatural time progression, artificial frame rates, synthetic temporal consistency, unnatural scene transitions, artificial pacing",
-            
-            "composition_artifacts": "artificial scene composition, synthetic framing, unnatural visual balance, artificial rule of thirds, synthetic visual hierarchy",
+        
+        # Indicators for a video don't change server-side - reuse a previous full sweep
+        cache_key = (index_id, video_id)
+        cached_results = search_results_cache.get(cache_key)
+        if cached_results is not None:
+            search_results_cache.move_to_end(cache_key)
+            logger.info(f"♻️ Reusing {len(cached_results)} cached AI indicators for video {video_id}")
+            log_detailed(video_id, f"Search completed: {len(cached_results)} AI indicators found (cached)", "INFO")
+            return list(cached_results)
+        
+        # Everything but the query text is the same for every category - build it once
+        search_kwargs = dict(
+            index_id=index_id,
+            search_options=MARENGO_SEARCH_OPTIONS,
+            threshold="medium",
+            sort_option="score",
+            group_by="clip",
+            page_limit=10,  # Increased limit since we're batching
+            filter=json.dumps({"id": [video_id]})  # Filter as JSON string
+        )
+        
+        async def search_category(category, query_text):
+            logger.info(f"🔍 Searching for {category} indicators...")
+            log_detailed(video_id, f"Searching for {category} AI indicators in video", "INFO")
             
-            "detail_artifacts": "artificial fine details, synthetic micro-movements, unnatural precision, artificial sharpness, synthetic clarity patterns",
+            # Use the correct SDK method: search.query
+            results = await asyncio.to_thread(
+                search_client.query, query_text=query_text, **search_kwargs
+            )
             
-            "interaction_artifacts": "unnatural object interactions, artificial physics, synthetic collision detection, unnatural gravity effects, artificial material responses"
-        }
+            data = getattr(results, 'data', None)
+            if data:
+                # Add category label to results
+                for result in data:
+                    if hasattr(result, '__dict__'):
+                        result.category = category
+                logger.info(f"✅ Found {len(data)} {category} indicators")
+                return data
+            logger.info(f"ℹ️ No {category} indicators found")
+            return []
         
         all_results = []
         searches_completed = 0
-        max_searches_before_check = 5  # Check completion status every 5 searches
-        
-        for category, query_text in ai_detection_categories.items():
-            # Check periodically if video is already completed (don't check every single search to reduce DB hits)
-            if early_exit_video_id and searches_completed > 0 and searches_completed % max_searches_before_check == 0:
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                cursor.execute("SELECT status, current_confidence FROM videos WHERE id = ?", (early_exit_video_id,))
-                status_check = cursor.fetchone()
-                conn.close()
+        searches_failed = 0
+        max_searches_before_check = 5  # Searches in flight at once; completion is checked between waves
+        categories = list(AI_DETECTION_CATEGORIES.items())
+        
+        for start in range(0, len(categories), max_searches_before_check):
+            # Check between waves if video is already completed (don't check every single search to reduce DB hits)
+            if early_exit_video_id and searches_completed > 0:
+                status_check = await _fetchone(
+                    "SELECT status, current_confidence FROM videos WHERE id = ?", (early_exit_video_id,)
+                )
                 
                 if status_check and status_check[0] == 'completed' and status_check[1] and status_check[1] >= 100.0:
-                    logger.info(f"⏭️ Stopping search loop early - video {early_exit_video_id} already completed with {status_check[1]}% confidence (completed {searches_completed} of {len(ai_detection_categories)} searches)")
+                    logger.info(f"⏭️ Stopping search loop early - video {early_exit_video_id} already completed with {status_check[1]}% confidence (completed {searches_completed} of {len(AI_DETECTION_CATEGORIES)} searches)")
                     break
             
             # Note: We previously had an early exit heuristic that stopped after 8 searches with 0 indicators.
             # We removed it to ensure comprehensive detection across all 15 categories for maximum accuracy.
             
-            try:
-                logger.info(f"🔍 Searching for {category} indicators...")
-                log_detailed(video_id, f"Searching for {category} AI indicators in video", "INFO")
-                
-                # Use the correct SDK method: search.query
-                results = search_client.query(
-                    index_id=index_id,
-                    search_options=["visual", "audio"],
-                    query_text=query_text,
-                    threshold="medium",
-                    sort_option="score",
-                    group_by="clip",
-                    page_limit=10,  # Increased limit since we're batching
-                    filter=json.dumps({"id": [video_id]})  # Filter as JSON string
-                )
-                
-                if results and hasattr(results, 'data') and results.data:
-                    # Add category label to results
-                    for result in results.data:
-                        if hasattr(result, '__dict__'):
-                            result.category = category
-                    all_results.extend(results.data)
-                    logger.info(f"✅ Found {len(results.data)} {category} indicators")
-                else:
-                    logger.info(f"ℹ️ No {category} indicators found")
-                
-                searches_completed += 1
-                    
-            except Exception as e:
-                logger.warning(f"Search query failed for {category}: {e}")
+            # The searches are independent network round-trips - run each wave concurrently
+            wave = categories[start:start + max_searches_before_check]
+            outcomes = await asyncio.gather(
+                *(search_category(category, query_text) for category, query_text in wave),
+                return_exceptions=True
+            )
+            for (category, _), outcome in zip(wave, outcomes):
                 searches_completed += 1
+                if isinstance(outcome, Exception):
+                    logger.warning(f"Search query failed for {category}: {outcome}")
+                    searches_failed += 1
+                else:
+                    all_results.extend(outcome)
         
         logger.info(f"🔍 Total AI indicators found: {len(all_results)} (completed {searches_completed} searches)")
         if len(all_results) == 0:
@@ -1110,42 +1609,39 @@ class AIDetectionService:
             log_detailed(video_id, f"✅ Search completed: 0 AI indicators found - Video passes as real!", "SUCCESS")
         else:
             log_detailed(video_id, f"Search completed: {len(all_results)} AI indicators found", "INFO")
+        
+        # Only remember complete, error-free sweeps
+        if searches_completed == len(AI_DETECTION_CATEGORIES) and not searches_failed:
+            search_results_cache[cache_key] = list(all_results)
+            if len(search_results_cache) > SEARCH_RESULTS_CACHE_SIZE:
+                search_results_cache.popitem(last=False)
         return all_results
     
     @staticmethod
     async def _analyze_with_pegasus_content(analyze_client, video_id: str):
         """Analyze video content using Pegasus (video-to-text)"""
-        content_analysis_prompts = [
-            "Analyze this AI-generated video and provide a detailed content description. This video was created using AI generation tools and our goal is to enhance it. Include: VISUAL ELEMENTS - Describe all visible objects, people, animals, and environments. Describe colors, lighting, composition, and visual style. Describe camera movements, angles, and cinematography. Describe any text, signs, or written content. MOTION AND ACTION - Describe all movements, actions, and activities happening in the video. Describe the pace and rhythm of the video. Describe any interactions between subjects. Describe any changes in the scene over time. AUDIO ELEMENTS - Describe any sounds, music, speech, or audio content. Describe the mood and atmosphere created by audio. Describe any dialogue or narration. EMOTIONAL AND NARRATIVE CONTENT - Describe the mood, tone, and emotional content. Describe any story or narrative elements. Describe the overall message or purpose of the video. Describe the target audience or context. Focus on identifying areas that could be improved in the next AI generation iteration.",
-            
-            "Provide a comprehensive technical and artistic analysis of this AI-generated video. This video was created using AI tools and we need to enhance it. Include: TECHNICAL QUALITY - Assess video resolution, clarity, and technical quality. Describe camera work, framing, and cinematography techniques. Assess lighting, color grading, and visual effects. Describe audio quality and sound design. ARTISTIC ELEMENTS - Describe the visual style, aesthetic, and artistic choices. Describe the composition and visual balance. Describe the use of color, contrast, and visual elements. Describe the overall artistic vision and execution. CONTENT ANALYSIS - Describe the main subject matter and themes. Describe the setting, environment, and context. Describe any characters, people, or subjects. Describe the overall content and purpose of the video. Identify specific areas where the AI generation could be improved in the next iteration."
-        ]
-        
         analysis_results = []
         
-        for i, prompt in enumerate(content_analysis_prompts):
-            try:
-                # Use the correct TwelveLabs analyze endpoint - try direct function call
-                response = analyze_client.analyze(
-                    video_id=video_id,
-                    prompt=prompt,
-                    temperature=0.2
-                )
-                
-                if response and hasattr(response, 'data'):
-                    analysis_results.append({
-                        'analysis_type': f'content_analysis_{i+1}',
-                        'content_description': response.data,
-                        'prompt_used': prompt[:100] + "..."
-                    })
-                    
-            except Exception as e:
-                logger.error(f"❌ CRITICAL: Pegasus content analysis failed: {e}")
+        # The prompts are independent - run them concurrently instead of one after another
+        responses = await asyncio.gather(*(
+            _pegasus_analyze(analyze_client, video_id, prompt, 0.2)
+            for prompt in PEGASUS_CONTENT_PROMPTS
+        ), return_exceptions=True)
+        
+        for i, (prompt, response) in enumerate(zip(PEGASUS_CONTENT_PROMPTS, responses)):
+            if isinstance(response, Exception):
+                logger.error(f"❌ CRITICAL: Pegasus content analysis failed: {response}")
                 # Don't silently continue - this is a critical failure
                 analysis_results.append({
                     'analysis_type': f'content_analysis_{i+1}_FAILED',
-                    'content_description': f"PEGASUS ANALYSIS FAILED: {str(e)}",
-                    'error': str(e)
+                    'content_description': f"PEGASUS ANALYSIS FAILED: {str(response)}",
+                    'error': str(response)
+                })
+            elif response and hasattr(response, 'data'):
+                analysis_results.append({
+                    'analysis_type': f'content_analysis_{i+1}',
+                    'content_description': response.data,
+                    'prompt_used': prompt[:100] + "..."
                 })
         
         if not analysis_results or all('FAILED' in result.get('analysis_type', '') for result in analysis_results):
@@ -1157,53 +1653,43 @@ class AIDetectionService:
     @staticmethod
     async def _analyze_with_pegasus(analyze_client, video_id: str):
         """Analyze video using Pegasus for AI detection"""
-        analysis_prompts = [
-            "Perform a detailed visual analysis of this video to detect AI generation indicators. Focus on: FACIAL FEATURES - Analyze facial symmetry for unnatural perfection, examine eye movements for mechanical patterns, check skin texture for artificial smoothness, look for inconsistent facial proportions. MOVEMENT PATTERNS - Identify robotic or mechanical movements, check for unnatural motion fluidity, examine gesture timing for artificial precision, look for impossible or physics-defying actions. VISUAL ARTIFACTS - Detect inconsistent lighting and shadows, identify artificial texture patterns, look for rendering artifacts and compression issues, check for unnatural color gradients and reflections. ENVIRONMENTAL CONSISTENCY - Analyze object placement and interactions, check for impossible scenarios or physics violations, examine depth of field and perspective accuracy, look for temporal inconsistencies. IMPOSSIBLE SCENARIOS - Look for animals doing human activities, impossible physics, unnatural object behavior, or scenarios that defy logic. Provide specific timestamps and confidence levels for each detected indicator.",
-            
-            "Conduct a technical analysis of this video to identify AI generation artifacts. Examine: GENERATION ARTIFACTS - Look for GAN, diffusion model, or neural network artifacts, identify compression and encoding anomalies, check for artificial noise patterns and filtering, detect synthetic pixelation and color bleeding. AUDIO ANALYSIS - Analyze speech patterns for robotic characteristics, check for artificial voice modulation and intonation, examine audio-visual synchronization issues, look for synthetic background noise patterns. RENDERING QUALITY - Assess overall rendering consistency, check for artificial sharpness or blur, identify unnatural material properties, look for synthetic lighting and shadow patterns. TECHNICAL INDICATORS - Detect model-specific artifacts (Stable Diffusion, DALL-E, etc.), identify deep learning generation signatures, check for artificial processing patterns, look for neural network training artifacts. CREATIVE INDICATORS - Look for AI-generated artistic content, synthetic creative expressions, artificial creative patterns, or generated media content. Rate the likelihood of AI generation from 1-10 with detailed evidence.",
-            
-            "Analyze this video for contextual and behavioral indicators of AI generation. Evaluate: BEHAVIORAL PATTERNS - Examine human behavior for unnatural consistency, check for mechanical or robotic mannerisms, analyze emotional expressions for artificial patterns, look for unrealistic social interactions. NARRATIVE CONSISTENCY - Check story flow for artificial progression, examine cause-and-effect relationships, look for impossible or illogical scenarios, analyze temporal consistency and pacing. ENVIRONMENTAL LOGIC - Verify physical laws and natural phenomena, check for impossible object interactions, examine weather and environmental consistency, look for artificial world-building elements. CONTEXTUAL ANOMALIES - Identify elements that don't fit the scene, check for anachronistic or impossible details, examine cultural and social context accuracy, look for artificial narrative elements. IMPOSSIBLE SCENARIOS - Look for animals doing human activities, impossible physics, unnatural object behavior, or scenarios that defy logic. CREATIVE INDICATORS - Check for AI-generated creative content, synthetic artistic expressions, artificial creative patterns, or generated media content. Provide specific examples with timestamps and rate overall AI generation likelihood."
-        ]
-        
         analysis_results = []
         
-        for prompt in analysis_prompts:
-            try:
-                # Use the correct TwelveLabs analyze endpoint - try direct function call
-                response = analyze_client.analyze(
-                    video_id=video_id,
-                    prompt=prompt,
-                    temperature=0.1
-                )
-                
-                if response and hasattr(response, 'data'):
-                    # Safely serialize usage data
-                    usage_data = None
-                    if hasattr(response, 'usage') and response.usage:
-                        try:
-                            usage_data = {
-                                'prompt_tokens': getattr(response.usage, 'prompt_tokens', 0),
-                                'completion_tokens': getattr(response.usage, 'completion_tokens', 0),
-                                'total_tokens': getattr(response.usage, 'total_tokens', 0)
-                            }
-                        except:
-                            usage_data = str(response.usage)
-                    
-                    analysis_results.append({
-                        'prompt': prompt,
-                        'response': response.data,
-                        'usage': usage_data
-                    })
-                    
-            except Exception as e:
-                logger.error(f"❌ CRITICAL: Pegasus AI detection analysis failed: {e}")
+        # The prompts are independent - run them concurrently instead of one after another
+        responses = await asyncio.gather(*(
+            _pegasus_analyze(analyze_client, video_id, prompt, 0.1)
+            for prompt in PEGASUS_DETECTION_PROMPTS
+        ), return_exceptions=True)
+        
+        for prompt, response in zip(PEGASUS_DETECTION_PROMPTS, responses):
+            if isinstance(response, Exception):
+                logger.error(f"❌ CRITICAL: Pegasus AI detection analysis failed: {response}")
                 # Don't silently continue - this is a critical failure
                 analysis_results.append({
                     'prompt': prompt,
-                    'response': f"PEGASUS ANALYSIS FAILED: {str(e)}",
-                    'error': str(e),
+                    'response': f"PEGASUS ANALYSIS FAILED: {str(response)}",
+                    'error': str(response),
                     'failed': True
                 })
+            elif response and hasattr(response, 'data'):
+                # Safely serialize usage data
+                usage_data = None
+                usage = getattr(response, 'usage', None)
+                if usage:
+                    try:
+                        usage_data = {
+                            'prompt_tokens': getattr(usage, 'prompt_tokens', 0),
+                            'completion_tokens': getattr(usage, 'completion_tokens', 0),
+                            'total_tokens': getattr(usage, 'total_tokens', 0)
+                        }
+                    except:
+                        usage_data = str(usage)
+                
+                analysis_results.append({
+                    'prompt': prompt,
+                    'response': response.data,
+                    'usage': usage_data
+                })
         
         if not analysis_results or all(result.get('failed', False) for result in analysis_results):
             logger.error("❌ CRITICAL: ALL Pegasus AI detection failed - quality score will be unreliable")
@@ -1226,24 +1712,17 @@ class AIDetectionService:
             for result in analysis_results:
                 # Only count analysis results that indicate quality problems
                 if isinstance(result, dict):
-                    content = result.get('content', '').lower()
-                    # Look for quality issues in the analysis
-                    if any(issue in content for issue in [
-                        'poor quality', 'low quality', 'artificial', 'synthetic',
-                        'rendering artifacts', 'compression issues', 'blurry',
-                        'inconsistent', 'unnatural', 'mechanical', 'robotic'
-                    ]):
-                        quality_issues += 1
-                elif hasattr(result, 'content'):
-                    content = str(result.content).lower()
-                    if any(issue in content for issue in [
-                        'poor quality', 'low quality', 'artificial', 'synthetic',
-                        'rendering artifacts', 'compression issues', 'blurry',
-                        'inconsistent', 'unnatural', 'mechanical', 'robotic'
-                    ]):
-                        quality_issues += 1
-            
-            analysis_penalty = min(quality_issues * 8, 50)
+                    content = result.get('content', '')
+                else:
+                    content = getattr(result, 'content', None)
+                    if content is None:
+                        continue
+                    content = str(content)
+                # Look for quality issues in the analysis - one case-insensitive scan
+                if QUALITY_ISSUE_RE.search(content):
+                    quality_issues += 1
+            
+            analysis_penalty = min(quality_issues * 8, PEGASUS_MAX_PENALTY)
         
         # Start with 100 and subtract penalties
         quality_score = max(100 - search_penalty - analysis_penalty, 0)
@@ -1277,22 +1756,15 @@ class AIDetectionService:
             for result in analysis_results:
                 # Check if the analysis result actually indicates AI generation
                 if isinstance(result, dict):
-                    content = result.get('content', '').lower()
-                    # Look for positive AI indicators in the analysis
-                    if any(indicator in content for indicator in [
-                        'ai generated', 'artificial', 'synthetic', 'generated by', 
-                        'neural network', 'machine learning', 'deepfake', 'fake',
-                        'unnatural', 'robotic', 'mechanical', 'artificial intelligence'
-                    ]):
-                        ai_indicating_results.append(result)
-                elif hasattr(result, 'content'):
-                    content = str(result.content).lower()
-                    if any(indicator in content for indicator in [
-                        'ai generated', 'artificial', 'synthetic', 'generated by', 
-                        'neural network', 'machine learning', 'deepfake', 'fake',
-                        'unnatural', 'robotic', 'mechanical', 'artificial intelligence'
-                    ]):
-                        ai_indicating_results.append(result)
+                    content = result.get('content', '')
+                else:
+                    content = getattr(result, 'content', None)
+                    if content is None:
+                        continue
+                    content = str(content)
+                # Look for positive AI indicators in the analysis - one case-insensitive scan
+                if AI_INDICATOR_RE.search(content):
+                    ai_indicating_results.append(result)
             
             if ai_indicating_results:
                 severity_weights = {'high': 30, 'medium': 20, 'low': 10}
@@ -1364,6 +1836,11 @@ class AIDetectionService:
         
         return logs
 
+# Enhanced prompts per (prompt, analysis) fingerprint - regenerating from the same inputs
+# would only repeat the same Gemini call
+ENHANCED_PROMPT_CACHE_SIZE = 16
+enhanced_prompt_cache = OrderedDict()  # (original_prompt, analysis JSON) -> enhanced prompt
+
 class PromptEnhancementService:
     @staticmethod
     async def enhance_prompt(original_prompt: str, analysis_results: Dict[str, Any], gemini_api_key: Optional[str] = None):
@@ -1371,11 +1848,24 @@ class PromptEnhancementService:
         try:
             logger.info("🔧 Enhancing prompt based on analysis results")
             
+            key = (original_prompt, json.dumps(analysis_results, sort_keys=True, default=str))
+            enhanced_prompt = enhanced_prompt_cache.get(key)
+            if enhanced_prompt is not None:
+                enhanced_prompt_cache.move_to_end(key)
+                logger.info("♻️ Reusing enhanced prompt for identical prompt and analysis")
+                return enhanced_prompt
+            
             # Create enhanced prompt using GPT
             enhanced_prompt = await PromptEnhancementService._generate_enhanced_prompt(
-                original_prompt, analysis_results
+                original_prompt, analysis_results, gemini_api_key
             )
             
+            # Only cache real enhancements - the original prompt comes back on Gemini failures
+            if enhanced_prompt != original_prompt:
+                enhanced_prompt_cache[key] = enhanced_prompt
+                if len(enhanced_prompt_cache) > ENHANCED_PROMPT_CACHE_SIZE:
+                    enhanced_prompt_cache.popitem(last=False)
+            
             return enhanced_prompt
             
         except Exception as e:
@@ -1383,29 +1873,18 @@ class PromptEnhancementService:
             return original_prompt
     
     @staticmethod
-    async def _generate_enhanced_prompt(original_prompt: str, analysis_results: Dict[str, Any]):
+    async def _generate_enhanced_prompt(original_prompt: str, analysis_results: Dict[str, Any], gemini_api_key: Optional[str] = None):
         """Generate enhanced prompt using Gemini"""
         try:
-            from google.genai import Client
+            client = _genai_client(gemini_api_key or GEMINI_API_KEY)
             
-            # Configure Gemini
-            client = Client(api_key=GEMINI_API_KEY)
-            
-            prompt_text = f"""You are an expert video generation prompt engineer. Analyze the given prompt and AI detection results to create an improved prompt that will generate higher quality, more realistic videos with fewer AI artifacts.
-
-Original prompt: {original_prompt}
-
-AI Detection Results: {json.dumps(analysis_results, indent=2)}
-
-Create an enhanced prompt that addresses the detected issues and improves video quality. Focus on:
-1. Making the scenario more natural and realistic
-2. Reducing AI-generated artifacts
-3. Improving visual consistency
-4. Adding specific details that make the video more believable
-
-Return only the enhanced prompt, no additional text."""
+            prompt_text = PROMPT_REWRITE_TEMPLATE.format(
+                original_prompt=original_prompt,
+                analysis_results=json.dumps(analysis_results, indent=2)
+            )
             
-            response = client.models.generate_content(
+            response = await asyncio.to_thread(
+                client.models.generate_content,
                 model='gemini-2.5-flash',
                 contents=prompt_text
             )
@@ -1453,11 +1932,7 @@ async def health_check():
     # Check database connection
     db_status = "healthy"
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM videos")
-        video_count = cursor.fetchone()[0]
-        conn.close()
+        video_count = (await _fetchone("SELECT COUNT(*) FROM videos"))[0]
     except Exception as e:
         db_status = f"unhealthy: {str(e)}"
         video_count = 0
@@ -1494,11 +1969,7 @@ async def generate_video(request: VideoGenerationRequest, background_tasks: Back
         
         # Also clear any database logs for all videos to ensure completely fresh start
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("UPDATE videos SET detailed_logs = NULL")
-            conn.commit()
-            conn.close()
+            await asyncio.to_thread(_clear_stored_logs)
         except Exception as e:
             logger.warning(f"Could not clear database logs: {e}")
         
@@ -1519,7 +1990,7 @@ async def generate_video(request: VideoGenerationRequest, background_tasks: Back
             logger.info(f"📊 Starting iterative enhancement for video {request.video_id}")
             try:
                 # Get video details from TwelveLabs
-                client = TwelveLabs(api_key=twelvelabs_api_key)
+                client = _tl_client(twelvelabs_api_key)
                 
                 # Determine which index to search based on iteration
                 search_index_id = "68d0f9f2e23608ddb86fba7a"  # Start with prod index for source videos
@@ -1553,38 +2024,18 @@ async def generate_video(request: VideoGenerationRequest, background_tasks: Back
                 
                 # STEP 2: Feed analysis to Gemini Flash for enhancement
                 logger.info(f"🧠 Step 2: Processing with Gemini Flash for prompt enhancement")
-                from google.genai import Client
-                client = Client(api_key=GEMINI_API_KEY)
-                
-                analysis_prompt = f"""
-                You are analyzing iteration #{iteration_number} of an AI video enhancement process.
-                
-                Original request: {request.prompt}
-                Video ID: {request.video_id}
-                
-                This is an AI-generated video that needs enhancement. The video was created using AI generation tools and we need to improve it.
-                
-                Pegasus Content Analysis:
-                {content_description}
-                
-                Based on this detailed content analysis of the AI-generated video, create an ENHANCED prompt for the next iteration that:
-                1. Uses the content description to understand what the AI-generated video actually contains
-                2. Identifies specific areas for improvement based on the analysis of the AI-generated content
-                3. Maintains the core content but enhances AI generation quality:
-                   - Visual quality and coherence (fix AI artifacts)
-                   - Cinematography and composition (improve AI camera work)
-                   - Lighting and color grading (enhance AI lighting)
-                   - Motion smoothness and realism (fix AI motion artifacts)
-                   - Subject details and consistency (improve AI subject generation)
-                4. Adds specific technical improvements for AI video generation based on the content analysis
-                5. Includes version indicator: "Iteration {iteration_number + 1}"
-                6. Focuses on making the AI generation more natural and less artificial
+                client = _genai_client(request.gemini_api_key or GEMINI_API_KEY)
                 
-                Return ONLY the enhanced prompt for AI video generation, no explanations.
-                Be specific and detailed about improvements needed for the AI-generated video content.
-                """
+                analysis_prompt = ENHANCEMENT_PROMPT_TEMPLATE.format(
+                    iteration_number=iteration_number,
+                    original_prompt=request.prompt,
+                    video_id=request.video_id,
+                    content_description=content_description,
+                    next_iteration=iteration_number + 1
+                )
                 
-                response = client.models.generate_content(
+                response = await asyncio.to_thread(
+                    client.models.generate_content,
                     model='gemini-2.0-flash-exp',
                     contents=analysis_prompt
                 )
@@ -1598,11 +2049,8 @@ async def generate_video(request: VideoGenerationRequest, background_tasks: Back
                 enhanced_prompt = f"{request.prompt} - Enhanced Iteration {iteration_number}"
         
         # Store video request in database with iteration tracking
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
         generation_id = str(uuid.uuid4())
-        cursor.execute("""
+        video_id = await _insert("""
             INSERT INTO videos (
                 prompt, enhanced_prompt, status, confidence_threshold, 
                 progress, generation_id, index_id, iteration_count,
@@ -1614,10 +2062,7 @@ async def generate_video(request: VideoGenerationRequest, background_tasks: Back
             0, generation_id, index_id, iteration_number,
             request.video_id, request.max_retries if request.max_retries and request.max_retries > 0 else 3
         ))
-        
-        video_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        missing_video_ids.pop(video_id, None)
         
         # Debug: Log what was stored
         stored_value = request.max_retries if request.max_retries and request.max_retries > 0 else 3
@@ -1684,11 +2129,7 @@ async def upload_video(
         
         # Also clear any database logs for all videos to ensure completely fresh start
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("UPDATE videos SET detailed_logs = NULL")
-            conn.commit()
-            conn.close()
+            await asyncio.to_thread(_clear_stored_logs)
         except Exception as e:
             logger.warning(f"Could not clear database logs: {e}")
         
@@ -1712,34 +2153,27 @@ async def upload_video(
         filename = f"uploaded_video_{timestamp}_{file.filename}"
         filepath = os.path.join(upload_dir, filename)
         
-        with open(filepath, "wb") as buffer:
-            content = file.file.read()
-            buffer.write(content)
+        content_hash = await asyncio.to_thread(_save_upload, file.file, filepath)
         
         # Store in database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
+        video_id = await _insert("""
             INSERT INTO videos (prompt, status, video_path, progress, index_id)
             VALUES (?, ?, ?, ?, ?)
         """, (original_prompt, "uploading", filepath, 50, index_id))
-        
-        video_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        missing_video_ids.pop(video_id, None)
         
         # Upload to TwelveLabs
         try:
-            twelvelabs_video_id = await VideoGenerationService.upload_to_twelvelabs(filepath, index_id, twelvelabs_api_key, video_id)
+            twelvelabs_video_id = await VideoGenerationService.upload_to_twelvelabs(
+                filepath, index_id, twelvelabs_api_key, video_id, content_hash=content_hash
+            )
             
             # CRITICAL: Wait for video to be indexed before analysis
             logger.info(f"⏳ Waiting for video {twelvelabs_video_id} to be indexed...")
-            log_progress(video_id, "⏳ Waiting for video indexing to complete...", 60, "indexing")
+            await log_progress(video_id, "⏳ Waiting for video indexing to complete...", 60, "indexing")
             
             # Create TwelveLabs client for indexing check
-            from twelvelabs import TwelveLabs
-            client = TwelveLabs(api_key=twelvelabs_api_key)
+            client = _tl_client(twelvelabs_api_key)
             
             # Poll for indexing completion
             max_wait_time = 300  # 5 minutes max
@@ -1747,11 +2181,12 @@ async def upload_video(
             while wait_time < max_wait_time:
                 try:
                     # Check if video is indexed using the correct API
-                    video_info = client.indexes.videos.retrieve(
+                    video_info = await asyncio.to_thread(
+                        client.indexes.videos.retrieve,
                         index_id=index_id,
                         video_id=twelvelabs_video_id
                     )
-                    if hasattr(video_info, 'indexed_at') and video_info.indexed_at:
+                    if getattr(video_info, 'indexed_at', None):
                         logger.info(f"✅ Video {twelvelabs_video_id} successfully indexed")
                         break
                 except Exception as e:
@@ -1759,20 +2194,18 @@ async def upload_video(
                 
                 await asyncio.sleep(10)  # Wait 10 seconds
                 wait_time += 10
-                log_progress(video_id, f"⏳ Still waiting for indexing... ({wait_time}s)", 60 + (wait_time/10), "indexing")
+                await log_progress(video_id, f"⏳ Still waiting for indexing... ({wait_time}s)", 60 + (wait_time/10), "indexing")
             
             if wait_time >= max_wait_time:
                 logger.warning(f"⚠️ Video indexing timeout after {max_wait_time}s")
-                log_progress(video_id, "⚠️ Indexing timeout - proceeding with analysis", 70, "analyzing")
+                await log_progress(video_id, "⚠️ Indexing timeout - proceeding with analysis", 70, "analyzing")
             
             # Check for usage limit
             if twelvelabs_video_id == "USAGE_LIMIT_EXCEEDED":
                 logger.warning("⚠️ TwelveLabs usage limit reached - skipping analysis")
                 
                 # Update status to completed without analysis
-                conn = sqlite3.connect(DB_PATH)
-                cursor = conn.cursor()
-                cursor.execute("""
+                await _execute("""
                     UPDATE videos SET 
                         status = ?, 
                         progress = ?, 
@@ -1784,8 +2217,6 @@ async def upload_video(
                 """, ("completed", 100, 
                       json.dumps({"error": "TwelveLabs usage limit reached - analysis skipped"}),
                       video_id))
-                conn.commit()
-                conn.close()
                 
                 return {
                     "success": True,
@@ -1795,27 +2226,19 @@ async def upload_video(
                 }
             
             # Update status to completed
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("""
+            await _execute("""
                 UPDATE videos SET status = ?, progress = ?, updated_at = CURRENT_TIMESTAMP 
                 WHERE id = ?
             """, ("uploaded", 100, video_id))
-            conn.commit()
-            conn.close()
             
             logger.info(f"✅ Video uploaded successfully: {filename}")
             
         except Exception as upload_error:
             # Update status to failed
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("""
+            await _execute("""
                 UPDATE videos SET status = ?, error_message = ?, updated_at = CURRENT_TIMESTAMP 
                 WHERE id = ?
             """, ("failed", str(upload_error), video_id))
-            conn.commit()
-            conn.close()
             
             raise HTTPException(status_code=500, detail=f"Failed to upload to TwelveLabs: {str(upload_error)}")
         
@@ -1831,6 +2254,8 @@ async def upload_video(
             }
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Video upload error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1846,41 +2271,34 @@ async def grade_video(video_id: int, index_id: str = None, twelvelabs_api_key: s
         twelvelabs_api_key = twelvelabs_api_key or TWELVELABS_API_KEY
         
         # Get video info
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM videos WHERE id = ?", (video_id,))
-        video = cursor.fetchone()
+        video = await _fetchone("SELECT twelvelabs_video_id FROM videos WHERE id = ?", (video_id,))
         
         if not video:
             raise HTTPException(status_code=404, detail="Video not found")
         
-        twelvelabs_video_id = video[9]  # twelvelabs_video_id column
+        twelvelabs_video_id = video[0]
         if not twelvelabs_video_id:
             raise HTTPException(status_code=400, detail="Video not indexed in TwelveLabs")
         
-        conn.close()
-        
         # Run AI detection
         analysis_results = await AIDetectionService.detect_ai_generation(
             index_id, twelvelabs_video_id, twelvelabs_api_key
         )
         
-        # Store analysis results
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO analysis_results (video_id, analysis_type, marengo_results, pegasus_results, quality_score, ai_detection_score)
-            VALUES (?, ?, ?, ?, ?, ?)
+        # Search results are SDK objects - convert once for both storage and the response
+        analysis_results = jsonable_encoder(analysis_results)
+        
+        # Store analysis results (detect_ai_generation doesn't score AI detection - store NULL then)
+        await _execute("""
+            INSERT INTO analysis_results (video_id, search_results, analysis_results, quality_score, ai_detection_score)
+            VALUES (?, ?, ?, ?, ?)
         """, (
             video_id, 
-            "ai_detection", 
-            json.dumps(analysis_results["search_results"]),
-            json.dumps(analysis_results["analysis_results"]),
-            analysis_results["quality_score"],
-            analysis_results["ai_detection_score"]
+            json.dumps(analysis_results.get("search_results", [])),
+            json.dumps(analysis_results.get("analysis_results", [])),
+            analysis_results.get("quality_score"),
+            analysis_results.get("ai_detection_score")
         ))
-        conn.commit()
-        conn.close()
         
         return VideoResponse(
             success=True,
@@ -1888,6 +2306,8 @@ async def grade_video(video_id: int, index_id: str = None, twelvelabs_api_key: s
             data=analysis_results
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ AI detection error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1916,15 +2336,11 @@ async def get_recent_logs(limit: int = 50):
         
         # Get recent database logs
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("""
+            recent_videos = await _fetchall("""
                 SELECT id, detailed_logs, updated_at FROM videos 
                 WHERE updated_at > datetime('now', '-30 seconds')
                 ORDER BY updated_at DESC LIMIT 3
             """)
-            recent_videos = cursor.fetchall()
-            conn.close()
             
             for video_id, detailed_logs_json, updated_at in recent_videos:
                 if detailed_logs_json:
@@ -1989,11 +2405,7 @@ async def clear_logs():
         
         # Clear database logs for all videos
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("UPDATE videos SET detailed_logs = NULL")
-            conn.commit()
-            conn.close()
+            await asyncio.to_thread(_clear_stored_logs)
         except Exception as e:
             logger.warning(f"Could not clear database logs: {e}")
         
@@ -2023,7 +2435,7 @@ async def stream_logs():
                             if i < len(global_log_buffer):
                                 log_entry = global_log_buffer[i]
                                 try:
-                                    yield f"data: {json.dumps(log_entry)}\n\n"
+                                    yield b"data: " + orjson.dumps(log_entry) + b"\n\n"
                                 except Exception:
                                     # Client disconnected, stop streaming
                                     return
@@ -2044,7 +2456,7 @@ async def stream_logs():
                                     'type': 'video'
                                 }
                                 try:
-                                    yield f"data: {json.dumps(log_data)}\n\n"
+                                    yield b"data: " + orjson.dumps(log_data) + b"\n\n"
                                 except Exception:
                                     # Client disconnected, stop streaming
                                     return
@@ -2054,7 +2466,7 @@ async def stream_logs():
                     if heartbeat_count >= 50:  # Every 5 seconds
                         heartbeat_count = 0
                         try:
-                            yield f"data: {json.dumps({'log': '💓 Heartbeat', 'timestamp': datetime.now().isoformat(), 'source': 'heartbeat', 'type': 'ping'})}\n\n"
+                            yield b"data: " + orjson.dumps({'log': '💓 Heartbeat', 'timestamp': datetime.now().isoformat(), 'source': 'heartbeat', 'type': 'ping'}) + b"\n\n"
                         except Exception:
                             # Client disconnected, stop streaming
                             return
@@ -2070,7 +2482,7 @@ async def stream_logs():
                                 'type': 'status'
                             }
                             try:
-                                yield f"data: {json.dumps(test_log)}\n\n"
+                                yield b"data: " + orjson.dumps(test_log) + b"\n\n"
                             except Exception:
                                 # Client disconnected, stop streaming
                                 return
@@ -2091,7 +2503,7 @@ async def stream_logs():
                             'source': 'error',
                             'type': 'error'
                         }
-                        yield f"data: {json.dumps(error_log)}\n\n"
+                        yield b"data: " + orjson.dumps(error_log) + b"\n\n"
                     except Exception:
                         # Can't send error, client disconnected
                         return
@@ -2116,13 +2528,10 @@ async def stream_logs():
 async def get_video_logs(video_id: int):
     """Get progress logs for a video (deprecated - use /stream-logs for real-time)"""
     try:
-        # Get logs from database first (persistent)
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT detailed_logs FROM videos WHERE id = ?", (video_id,))
-        result = cursor.fetchone()
-        conn.close()
+        # Get logs from database first (persistent), plus entries the flusher hasn't written yet
+        result, pending = await _fetchone_with_pending_logs(
+            "SELECT detailed_logs FROM videos WHERE id = ?", (video_id,), video_id
+        )
         
         db_logs = []
         if result and result[0]:
@@ -2139,8 +2548,8 @@ async def get_video_logs(video_id: int):
         memory_logs = progress_logs.get(video_id, [])
         # logger.info(f"📊 Video {video_id}: Memory logs count: {len(memory_logs)}")  # Removed verbose logging
         
-        # Combine logs, prioritizing database logs (persistent) then memory logs (recent)
-        all_logs = db_logs + memory_logs
+        # Combine logs, prioritizing database logs (persistent), then unflushed and memory logs (recent)
+        all_logs = db_logs + pending + memory_logs
         # Remove duplicates while preserving order
         seen = set()
         unique_logs = []
@@ -2179,12 +2588,10 @@ async def stream_video_logs(video_id: int):
         log_streams[video_id].append(client_queue)
         
         try:
-            # First, send all existing logs
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("SELECT detailed_logs FROM videos WHERE id = ?", (video_id,))
-            result = cursor.fetchone()
-            conn.close()
+            # Load the persisted log backlog and the entries not flushed yet
+            result, pending = await _fetchone_with_pending_logs(
+                "SELECT detailed_logs FROM videos WHERE id = ?", (video_id,), video_id
+            )
             
             existing_logs = []
             if result and result[0]:
@@ -2192,10 +2599,11 @@ async def stream_video_logs(video_id: int):
                     existing_logs = json.loads(result[0]) if isinstance(result[0], str) else result[0]
                 except:
                     existing_logs = []
+            existing_logs = existing_logs + pending
             
-            # Send existing logs
-            for log_entry in existing_logs:
-                yield f"data: {json.dumps({'log': log_entry})}\n\n"
+            # Send existing logs - one event per line, written to the socket in a single chunk
+            if existing_logs:
+                yield b"".join(b"data: " + orjson.dumps({'log': log_entry}) + b"\n\n" for log_entry in existing_logs)
             
             # Send a heartbeat every 15 seconds to keep connection alive
             last_heartbeat = time.time()
@@ -2203,13 +2611,13 @@ async def stream_video_logs(video_id: int):
             # Now stream new logs as they come in
             while True:
                 try:
-                    # Check for new logs with a short timeout
-                    log_entry = client_queue.get(timeout=1.0)
-                    yield f"data: {json.dumps({'log': log_entry})}\n\n"
+                    # Poll without blocking so the event loop keeps serving other requests
+                    log_entry = client_queue.get_nowait()
+                    yield b"data: " + orjson.dumps({'log': log_entry}) + b"\n\n"
                 except queue.Empty:
                     # Send heartbeat to keep connection alive
                     if time.time() - last_heartbeat > 15:
-                        yield f": heartbeat\n\n"
+                        yield b": heartbeat\n\n"
                         last_heartbeat = time.time()
                     await asyncio.sleep(0.1)
                     continue
@@ -2236,51 +2644,63 @@ async def stream_video_logs(video_id: int):
         }
     )
 
+# Stored status -> status shown to the frontend (anything not listed passes through)
+STATUS_DISPLAY_MAP = {"pending": "starting"}
+
+def pending_video_status(video_id: int):
+    """Status payload for a video that has not been created yet"""
+    return {
+        "success": True,
+        "data": {
+            "id": video_id,
+            "status": "pending",
+            "progress": 0,
+            "iteration_count": 0,
+            "max_iterations": 3,  # Will be updated when video is created
+            "ai_detection_score": 0.0,
+            "final_confidence": 0.0,
+            "video_path": None,
+            "twelvelabs_video_id": None,
+            "enhanced_prompt": None,
+            "analysis_results": None,
+            "detailed_logs": []
+        }
+    }
+
 @app.get("/api/videos/{video_id}/status")
 async def get_video_status(video_id: int):
     """Get the current status and progress of a video"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM videos WHERE id = ?", (video_id,))
-        video = cursor.fetchone()
+        if is_known_missing_video(video_id):
+            return pending_video_status(video_id)
+        
+        # Fetch the video row and its latest analysis in a single round trip
+        video, pending = await _fetchone_with_pending_logs("""
+            SELECT v.*, a.id, a.search_results, a.analysis_results, a.quality_score,
+                   a.ai_detection_score, a.created_at
+            FROM videos v
+            LEFT JOIN (
+                SELECT * FROM analysis_results WHERE video_id = ? ORDER BY created_at DESC LIMIT 1
+            ) a ON a.video_id = v.id
+            WHERE v.id = ?
+        """, (video_id, video_id), video_id)
         
         if not video:
             # Video not found yet, return pending status
             logger.info(f"📊 Video {video_id}: Not found in database yet, returning pending status")
-            return {
-                "success": True,
-                "data": {
-                    "id": video_id,
-                    "status": "pending",
-                    "progress": 0,
-                    "iteration_count": 0,
-                    "max_iterations": 3,  # Will be updated when video is created
-                    "ai_detection_score": 0.0,
-                    "final_confidence": 0.0,
-                    "video_path": None,
-                    "twelvelabs_video_id": None,
-                    "enhanced_prompt": None,
-                    "analysis_results": None,
-                    "detailed_logs": []
-                }
-            }
-        
-        # Get analysis results if available
-        cursor.execute("SELECT * FROM analysis_results WHERE video_id = ? ORDER BY created_at DESC LIMIT 1", (video_id,))
-        analysis = cursor.fetchone()
-        
-        conn.close()
+            remember_missing_video(video_id)
+            return pending_video_status(video_id)
         
+        # The last six columns are the analysis (a.id is NULL when no analysis exists)
+        analysis_id, search_results, analysis_results, quality_score, analysis_ai_score, analysis_created_at = video[-6:]
         analysis_data = None
-        if analysis:
+        if analysis_id is not None:
             analysis_data = {
-                "search_results": analysis[2],
-                "analysis_results": analysis[3],
-                "quality_score": analysis[4],
-                "ai_detection_score": analysis[5],
-                "created_at": analysis[6]
+                "search_results": search_results,
+                "analysis_results": analysis_results,
+                "quality_score": quality_score,
+                "ai_detection_score": analysis_ai_score,
+                "created_at": analysis_created_at
             }
         
         # Parse detailed logs if available
@@ -2290,6 +2710,7 @@ async def get_video_status(video_id: int):
                 detailed_logs = json.loads(video[18]) if isinstance(video[18], str) else video[18]
             except:
                 detailed_logs = []
+        detailed_logs = detailed_logs + pending
         
         # Debug: Log the max_iterations value (removed verbose logging)
         # logger.info(f"📊 Video {video_id}: Database max_iterations = {video[13]} (type: {type(video[13])})")
@@ -2297,19 +2718,7 @@ async def get_video_status(video_id: int):
         # log_detailed(video_id, f"🔧 DEBUG: Retrieved max_iterations = {video[13]} from database", "INFO")  # Removed verbose logging
         
         # Determine better status display
-        raw_status = video[3]
-        if raw_status == "pending":
-            status = "starting"
-        elif raw_status == "generating":
-            status = "generating"
-        elif raw_status == "analyzing":
-            status = "analyzing"
-        elif raw_status == "completed":
-            status = "completed"
-        elif raw_status == "failed":
-            status = "failed"
-        else:
-            status = raw_status
+        status = STATUS_DISPLAY_MAP.get(video[3], video[3])
         
         # Get the actual confidence score from the database
         # Use current_confidence (video[6]) which is the quality score
@@ -2323,11 +2732,7 @@ async def get_video_status(video_id: int):
                 logger.info(f"📊 Video {video_id}: Found quality_score={quality_score_from_analysis}% in analysis, updating final_confidence from 0.0")
                 final_confidence = quality_score_from_analysis
                 # Update the database with the correct value
-                conn_temp = sqlite3.connect(DB_PATH)
-                cursor_temp = conn_temp.cursor()
-                cursor_temp.execute("UPDATE videos SET current_confidence = ? WHERE id = ?", (final_confidence, video_id))
-                conn_temp.commit()
-                conn_temp.close()
+                await _execute("UPDATE videos SET current_confidence = ? WHERE id = ?", (final_confidence, video_id))
         
         # Check video playback availability
         video_available_locally = video[4] and os.path.exists(video[4]) if video[4] else False
@@ -2372,34 +2777,42 @@ async def get_video_status(video_id: int):
         logger.error(f"❌ Status check error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _iso(value) -> str:
+    """Render an SDK timestamp as ISO-8601, passing strings through untouched"""
+    if isinstance(value, str):
+        return value
+    return value.isoformat() if value else ""
+
 @app.get("/api/index/{index_id}/videos")
-async def list_index_videos(index_id: str, api_key: Optional[str] = None):
-    """List all videos in a TwelveLabs index"""
+async def list_index_videos(index_id: str, limit: int = Query(20, ge=1, le=500), api_key: Optional[str] = None):
+    """List up to `limit` videos in a TwelveLabs index"""
     try:
         # Use provided API key or default
         twelvelabs_api_key = api_key or TWELVELABS_API_KEY
         
         # Initialize TwelveLabs client
-        client = TwelveLabs(api_key=twelvelabs_api_key)
+        client = _tl_client(twelvelabs_api_key)
         
         # Get videos from the index
         videos = []
         try:
-            # First, verify the index exists and get its info
-            try:
-                index = client.indexes.retrieve(index_id=index_id)
+            # Fetch the index info and the first page of videos concurrently
+            # According to the SDK docs, listing should be client.indexes.videos.list()
+            # Ask for as many videos per page as the caller needs (API max is 50)
+            index, video_pager = await asyncio.gather(
+                asyncio.to_thread(client.indexes.retrieve, index_id=index_id),
+                asyncio.to_thread(client.indexes.videos.list, index_id=index_id, page_limit=min(limit, 50)),
+                return_exceptions=True
+            )
+            
+            # The index info is only informational - a failure here doesn't stop the listing
+            if isinstance(index, Exception):
+                logger.warning(f"Could not retrieve index info: {str(index)}")
+            else:
                 logger.info(f"Retrieved index: {index_id}, name={getattr(index, 'index_name', 'unknown')}")
                 logger.info(f"Index has {getattr(index, 'video_count', 0)} videos")
-            except Exception as e:
-                logger.warning(f"Could not retrieve index info: {str(e)}")
-            
-            # Now list videos in the index
-            # According to the SDK docs, this should be client.indexes.videos.list()
-            # Use page_limit to control pagination
-            video_pager = client.indexes.videos.list(
-                index_id=index_id,
-                page_limit=20  # Get up to 20 videos per page (should be enough for 6 unique videos)
-            )
+            if isinstance(video_pager, Exception):
+                raise video_pager
             
             # Track unique video IDs to avoid duplicates
             seen_video_ids = set()
@@ -2433,29 +2846,34 @@ async def list_index_videos(index_id: str, api_key: Optional[str] = None):
                     
                     # Try to get video dict representation
                     try:
-                        video_dict = video.dict() if hasattr(video, 'dict') else {}
+                        to_dict = getattr(video, 'dict', None)
+                        video_dict = to_dict() if to_dict else {}
                         logger.info(f"Video dict keys: {list(video_dict.keys())}")
                         logger.info(f"Video dict: {video_dict}")
                     except Exception as e:
                         logger.warning(f"Could not get video dict: {e}")
                         video_dict = {}
                     
+                    # Resolve the optional SDK attributes once per video
+                    system_metadata = getattr(video, 'system_metadata', None)
+                    metadata = getattr(video, 'metadata', None)
+                    hls = getattr(video, 'hls', None)
+                    
                     # Check system_metadata for filename
                     video_title = None
-                    if hasattr(video, 'system_metadata') and video.system_metadata:
-                        logger.info(f"System metadata type: {type(video.system_metadata)}")
-                        logger.info(f"System metadata: {video.system_metadata}")
-                        # Check if it's an object with attributes
-                        if hasattr(video.system_metadata, 'filename'):
-                            video_title = video.system_metadata.filename
-                            logger.info(f"Found title in system_metadata.filename: {video_title}")
-                        elif isinstance(video.system_metadata, dict):
-                            video_title = (video.system_metadata.get('filename') or
-                                         video.system_metadata.get('name') or
-                                         video.system_metadata.get('title') or
-                                         video.system_metadata.get('original_filename'))
+                    if system_metadata:
+                        logger.info(f"System metadata type: {type(system_metadata)}")
+                        logger.info(f"System metadata: {system_metadata}")
+                        # Check if it's a dict or an object with attributes
+                        if isinstance(system_metadata, dict):
+                            video_title = (system_metadata.get('filename') or
+                                         system_metadata.get('name') or
+                                         system_metadata.get('title') or
+                                         system_metadata.get('original_filename'))
                             if video_title:
                                 logger.info(f"Found title in system_metadata dict: {video_title}")
+                        elif (video_title := getattr(system_metadata, 'filename', None)) is not None:
+                            logger.info(f"Found title in system_metadata.filename: {video_title}")
                     
                     # Try video dict
                     if not video_title and video_dict:
@@ -2471,14 +2889,12 @@ async def list_index_videos(index_id: str, api_key: Optional[str] = None):
                         logger.info(f"Using fallback title: {video_title}")
                     
                     # Get duration
-                    duration = 0
-                    if hasattr(video, 'duration'):
-                        duration = video.duration
-                    elif hasattr(video, 'metadata') and video.metadata:
-                        if isinstance(video.metadata, dict):
-                            duration = video.metadata.get('duration', 0)
-                        elif hasattr(video.metadata, 'duration'):
-                            duration = video.metadata.duration
+                    duration = getattr(video, 'duration', None)
+                    if duration is None:
+                        if isinstance(metadata, dict):
+                            duration = metadata.get('duration', 0)
+                        else:
+                            duration = getattr(metadata, 'duration', 0) if metadata else 0
                     
                     # Try to get thumbnail URL
                     thumbnail_url = None
@@ -2493,17 +2909,16 @@ async def list_index_videos(index_id: str, api_key: Optional[str] = None):
                                 logger.info(f"Found thumbnail in video dict HLS: {thumbnail_url}")
                     
                     # Check system_metadata for thumbnail
-                    if not thumbnail_url and hasattr(video, 'system_metadata') and video.system_metadata:
-                        if isinstance(video.system_metadata, dict):
-                            thumbnail_url = (video.system_metadata.get('thumbnail_url') or
-                                           video.system_metadata.get('thumbnail'))
-                            if thumbnail_url:
-                                logger.info(f"Found thumbnail in system_metadata: {thumbnail_url}")
+                    if not thumbnail_url and isinstance(system_metadata, dict):
+                        thumbnail_url = (system_metadata.get('thumbnail_url') or
+                                         system_metadata.get('thumbnail'))
+                        if thumbnail_url:
+                            logger.info(f"Found thumbnail in system_metadata: {thumbnail_url}")
                     
                     # Try HLS thumbnails
-                    if not thumbnail_url and hasattr(video, 'hls') and video.hls:
-                        if hasattr(video.hls, 'thumbnail_urls') and video.hls.thumbnail_urls:
-                            thumbnail_url = video.hls.thumbnail_urls[0] if video.hls.thumbnail_urls else None
+                    if not thumbnail_url and hls:
+                        if hls_thumbnails := getattr(hls, 'thumbnail_urls', None):
+                            thumbnail_url = hls_thumbnails[0]
                             logger.info(f"Found thumbnail URL in HLS: {thumbnail_url}")
                     
                     # Get HLS video URL
@@ -2519,28 +2934,27 @@ async def list_index_videos(index_id: str, api_key: Optional[str] = None):
                         "title": video_title,
                         "description": "Video available for recursive enhancement",
                         "duration": duration,
-                        "created_at": str(getattr(video, 'created_at', '')),
-                        "updated_at": str(getattr(video, 'updated_at', '')),
+                        "created_at": _iso(getattr(video, 'created_at', None)),
+                        "updated_at": _iso(getattr(video, 'updated_at', None)),
                         "thumbnail": thumbnail_url,
                         "hls_url": hls_url,
                         "confidence_score": None
                     }
                     
                     # Try to get description from metadata
-                    if hasattr(video, 'metadata') and video.metadata:
-                        if isinstance(video.metadata, dict):
-                            video_data["description"] = video.metadata.get('description', video_data["description"])
-                        elif hasattr(video.metadata, 'description'):
-                            video_data["description"] = video.metadata.description
+                    if metadata:
+                        if isinstance(metadata, dict):
+                            video_data["description"] = metadata.get('description', video_data["description"])
+                        elif (description := getattr(metadata, 'description', None)) is not None:
+                            video_data["description"] = description
                     
                     videos.append(video_data)
                     unique_videos.append(video_id)
                     logger.info(f"Added unique video #{len(unique_videos)}: {video_data['title']} (ID: {video_id})")
                     
-                    # Don't stop early - let the pager complete to get all videos
-                    # The index has 6 videos, so we should get all of them
-                    if len(unique_videos) >= 50:  # Safety limit only
-                        logger.info(f"Reached safety limit with {len(unique_videos)} unique videos")
+                    # Stop paging as soon as we have enough videos
+                    if len(unique_videos) >= limit:
+                        logger.info(f"Reached requested limit with {len(unique_videos)} unique videos")
                         break
                     
                 except Exception as ve:
@@ -2555,7 +2969,7 @@ async def list_index_videos(index_id: str, api_key: Optional[str] = None):
             # Return empty list but include error info
             pass
         
-        logger.info(f"Returning {len(videos)} unique videos from index {index_id} (expected 6)")
+        logger.info(f"Returning {len(videos)} unique videos from index {index_id}")
         return {
             "success": True,
             "data": {
@@ -2569,39 +2983,89 @@ async def list_index_videos(index_id: str, api_key: Optional[str] = None):
         logger.error(f"❌ Index video list error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+VIDEO_LIST_COLUMNS = (
+    "id", "prompt", "status", "video_path", "confidence_threshold", "progress",
+    "generation_id", "error_message", "index_id", "twelvelabs_video_id",
+    "created_at", "updated_at"
+)
+
+def _video_list_item(row: sqlite3.Row) -> Dict[str, Any]:
+    """Shape a videos row for the list endpoint"""
+    return {
+        "video_id": row["id"],
+        "prompt": row["prompt"],
+        "status": row["status"],
+        "video_path": row["video_path"],
+        "confidence_threshold": row["confidence_threshold"],
+        "progress": row["progress"] or 0,
+        "generation_id": row["generation_id"],
+        "error_message": row["error_message"],
+        "index_id": row["index_id"],
+        "twelvelabs_video_id": row["twelvelabs_video_id"],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"]
+    }
+
+VIDEO_LIST_STREAM_BATCH = 200  # rows fetched per round trip when streaming the list as NDJSON
+
+def _video_list_query(limit: Optional[int], cursor: Optional[str]):
+    """Build the keyset-paginated list query, newest first on (created_at, id)"""
+    sql = f"SELECT {', '.join(VIDEO_LIST_COLUMNS)} FROM videos"
+    params = []
+    if cursor:
+        created_at, _, last_id = cursor.rpartition("|")
+        if not created_at or not last_id.isdigit():
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        sql += " WHERE (created_at, id) < (?, ?)"
+        params += [created_at, int(last_id)]
+    sql += " ORDER BY created_at DESC, id DESC"
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return sql, params
+
 @app.get("/api/videos")
-async def list_videos():
-    """List all videos with status and progress"""
+async def list_videos(
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson)$")
+):
+    """List videos with status and progress (paged with ?limit=&cursor=, streamed with ?format=ndjson)"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM videos ORDER BY created_at DESC")
-        videos = cursor.fetchall()
+        sql, params = _video_list_query(limit, cursor)
+        
+        if response_format == "ndjson":
+            async def generate():
+                # Keyset batches - no pooled connection or read transaction is held while the client reads
+                page_cursor = cursor
+                remaining = limit
+                while remaining is None or remaining > 0:
+                    batch_size = VIDEO_LIST_STREAM_BATCH if remaining is None else min(remaining, VIDEO_LIST_STREAM_BATCH)
+                    batch_sql, batch_params = _video_list_query(batch_size, page_cursor)
+                    rows = await _fetchall(batch_sql, tuple(batch_params), sqlite3.Row)
+                    if rows:
+                        yield b"".join(orjson.dumps(_video_list_item(row)) + b"\n" for row in rows)
+                    if len(rows) < batch_size:
+                        break
+                    page_cursor = f"{rows[-1]['created_at']}|{rows[-1]['id']}"
+                    if remaining is not None:
+                        remaining -= len(rows)
+            
+            return StreamingResponse(generate(), media_type="application/x-ndjson")
         
-        conn.close()
+        rows = await _fetchall(sql, tuple(params), sqlite3.Row)
         
-        return {
+        response = {
             "success": True,
-            "data": [
-                {
-                    "video_id": video[0],
-                    "prompt": video[1],
-                    "status": video[2],
-                    "video_path": video[3],
-                    "confidence_threshold": video[4],
-                    "progress": video[5] or 0,
-                    "generation_id": video[6],
-                    "error_message": video[7],
-                    "index_id": video[8],
-                    "twelvelabs_video_id": video[9],
-                    "created_at": video[10],
-                    "updated_at": video[11]
-                }
-                for video in videos
-            ]
+            "data": [_video_list_item(row) for row in rows]
         }
+        if limit:
+            last = rows[-1] if len(rows) == limit else None
+            response["next_cursor"] = f"{last['created_at']}|{last['id']}" if last else None
+        return response
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ List videos error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -2612,15 +3076,6 @@ async def test_video():
     """Test endpoint to serve video file directly"""
     video_path = "uploads/veo_generated_1_iter1_1761215946.mp4"
     if os.path.exists(video_path):
-        # Try streaming the file instead of FileResponse
-        def generate():
-            with open(video_path, "rb") as f:
-                while True:
-                    chunk = f.read(8192)  # 8KB chunks
-                    if not chunk:
-                        break
-                    yield chunk
-        
         return FileResponse(
             path=video_path,
             media_type="video/mp4",
@@ -2629,16 +3084,91 @@ async def test_video():
     else:
         raise HTTPException(status_code=404, detail="Test video not found")
 
+# TTL cache for TwelveLabs HLS details - stream URLs stay valid for a long time
+HLS_CACHE_TTL = 300  # seconds
+HLS_CACHE_SIZE = 1024
+hls_cache = {}  # (index_id, video_id) -> (monotonic expiry, (hls_url, thumbnail_urls, hls_status))
+hls_inflight = {}  # (index_id, video_id) -> asyncio.Task shared by concurrent cache misses
+
+hls_extractors = {}  # response type -> extractor, resolved once per type
+
+def _hls_from_dict(video_details):
+    hls = video_details.get('hls')
+    if not hls:
+        return None, [], None
+    return hls.get('video_url'), hls.get('thumbnail_urls') or [], hls.get('status')
+
+_HLS_GET = attrgetter('hls.video_url', 'hls.thumbnail_urls', 'hls.status')
+
+def _hls_from_object(video_details):
+    try:
+        hls_url, thumbnail_urls, hls_status = _HLS_GET(video_details)
+    except AttributeError:
+        # hls missing/None, or returned as a plain dict on an otherwise typed response
+        hls = getattr(video_details, 'hls', None)
+        if not hls:
+            return None, [], None
+        if isinstance(hls, dict):
+            return hls.get('video_url'), hls.get('thumbnail_urls') or [], hls.get('status')
+        hls_url = getattr(hls, 'video_url', None)
+        thumbnail_urls = getattr(hls, 'thumbnail_urls', None)
+        hls_status = getattr(hls, 'status', None)
+    return hls_url, thumbnail_urls or [], hls_status
+
+def _extract_hls(video_details):
+    """Pull (hls_url, thumbnail_urls, hls_status) out of a TwelveLabs video response"""
+    response_type = type(video_details)
+    extractor = hls_extractors.get(response_type)
+    if extractor is None:
+        extractor = _hls_from_dict if issubclass(response_type, dict) else _hls_from_object
+        hls_extractors[response_type] = extractor
+    return extractor(video_details)
+
+async def _get_hls(index_id: str, video_id: str):
+    """HLS details for a TwelveLabs video, served from the TTL cache when possible"""
+    key = (index_id, video_id)
+    cached = hls_cache.get(key)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    
+    # Single-flight: concurrent misses for the same video share one upstream call.
+    # No lock needed - nothing awaits between the lookup and the registration.
+    task = hls_inflight.get(key)
+    if task is None:
+        # The lookup runs in its own task so a disconnecting caller can't cancel it for the others
+        task = asyncio.create_task(_fetch_hls(key, index_id, video_id))
+        # Mark the outcome retrieved so the loop doesn't warn when every caller has gone
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        hls_inflight[key] = task
+    return await asyncio.shield(task)
+
+async def _fetch_hls(key: tuple, index_id: str, video_id: str):
+    """Retrieve HLS details from TwelveLabs and cache finished streams (run as the single-flight task)"""
+    try:
+        client = _tl_client(TWELVELABS_API_KEY)
+        video_details = await asyncio.to_thread(
+            client.indexes.videos.retrieve,
+            index_id=index_id,
+            video_id=video_id
+        )
+        hls = _extract_hls(video_details)
+        
+        # Only cache finished streams so videos still encoding are re-checked
+        hls_url, _, hls_status = hls
+        if hls_url and hls_status in (None, 'COMPLETE'):
+            if len(hls_cache) >= HLS_CACHE_SIZE:
+                hls_cache.clear()
+            hls_cache[key] = (time.monotonic() + HLS_CACHE_TTL, hls)
+        return hls
+    finally:
+        hls_inflight.pop(key, None)
+
 @app.get("/api/videos/{video_id}/play")
 async def play_video(video_id: int):
     """Play a generated video file - serves local file or redirects to HLS stream"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
         # Get full video info including prompt to verify it's the right video
-        cursor.execute("SELECT video_path, twelvelabs_video_id, index_id, prompt, source_video_id FROM videos WHERE id = ?", (video_id,))
-        video = cursor.fetchone()
+        video = await _fetchone("SELECT video_path, twelvelabs_video_id, index_id, prompt, source_video_id FROM videos WHERE id = ?", (video_id,))
         
         if not video:
             logger.error(f"❌ Video not found in database: {video_id}")
@@ -2649,7 +3179,6 @@ async def play_video(video_id: int):
         index_id = video[2]
         prompt = video[3]
         source_video_id = video[4]
-        conn.close()
         
         logger.info(f"🎬 Video play request: video_id={video_id}, path={video_path}, tl_id={twelvelabs_video_id}, source_id={source_video_id}")
         logger.info(f"📝 Video prompt: {prompt[:100] if prompt else 'None'}...")
@@ -2686,48 +3215,9 @@ async def play_video(video_id: int):
         elif twelvelabs_available:
             # Get HLS URL from TwelveLabs and redirect to it
             logger.info(f"📡 Getting HLS stream from TwelveLabs: {twelvelabs_video_id}")
-            client = TwelveLabs(api_key=TWELVELABS_API_KEY)
-            
             try:
-                # Retrieve video details with proper API structure
-                video_details = client.indexes.videos.retrieve(
-                    index_id=index_id,
-                    video_id=twelvelabs_video_id
-                )
-                
-                hls_url = None
-                thumbnail_url = None
-                hls_status = None
-                
-                # Extract HLS URL using multiple methods
-                # Method 1: Direct attribute access
-                if hasattr(video_details, 'hls') and video_details.hls:
-                    hls_data = video_details.hls
-                    if hasattr(hls_data, 'video_url'):
-                        hls_url = hls_data.video_url
-                    if hasattr(hls_data, 'thumbnail_urls') and hls_data.thumbnail_urls:
-                        thumbnail_url = hls_data.thumbnail_urls[0]
-                    if hasattr(hls_data, 'status'):
-                        hls_status = hls_data.status
-                
-                # Method 2: Dictionary conversion if needed
-                if not hls_url:
-                    try:
-                        if hasattr(video_details, 'dict'):
-                            video_dict = video_details.dict()
-                        elif hasattr(video_details, '__dict__'):
-                            video_dict = video_details.__dict__
-                        else:
-                            video_dict = dict(video_details)
-                        
-                        if 'hls' in video_dict and video_dict['hls']:
-                            hls_data = video_dict['hls']
-                            hls_url = hls_data.get('video_url')
-                            thumbnail_urls = hls_data.get('thumbnail_urls', [])
-                            thumbnail_url = thumbnail_urls[0] if thumbnail_urls else None
-                            hls_status = hls_data.get('status')
-                    except:
-                        pass
+                hls_url, thumbnail_urls, hls_status = await _get_hls(index_id, twelvelabs_video_id)
+                thumbnail_url = thumbnail_urls[0] if thumbnail_urls else None
                 
                 # Check if HLS is ready
                 if hls_status and hls_status != 'COMPLETE':
@@ -2777,11 +3267,7 @@ async def play_video(video_id: int):
 async def get_video_info(video_id: int):
     """Get video information for frontend display"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT video_path, twelvelabs_video_id, index_id FROM videos WHERE id = ?", (video_id,))
-        video = cursor.fetchone()
+        video = await get_video_row(video_id)
         
         if not video:
             raise HTTPException(status_code=404, detail="Video not found")
@@ -2789,7 +3275,6 @@ async def get_video_info(video_id: int):
         video_path = video[0]
         twelvelabs_video_id = video[1]
         index_id = video[2]
-        conn.close()
         
         local_file_available = video_path and os.path.exists(video_path)
         twelvelabs_available = bool(twelvelabs_video_id and index_id)
@@ -2804,52 +3289,9 @@ async def get_video_info(video_id: int):
         if twelvelabs_available and not local_file_available:
             # Get HLS URL for frontend using proper API call structure
             logger.info(f"🎬 Fetching HLS info for TwelveLabs video: {twelvelabs_video_id}")
-            client = TwelveLabs(api_key=TWELVELABS_API_KEY)
-            
             try:
-                # Use the correct API call structure as shown in the documentation
-                video_details = client.indexes.videos.retrieve(
-                    index_id=index_id,
-                    video_id=twelvelabs_video_id
-                )
-                
-                logger.info(f"📡 TwelveLabs response type: {type(video_details)}")
-                
-                # Handle the response properly based on TwelveLabs SDK structure
-                hls_url = None
-                thumbnail_url = None
-                hls_status = None
-                
-                # Try direct attribute access first
-                if hasattr(video_details, 'hls'):
-                    hls_data = video_details.hls
-                    if hls_data:
-                        if hasattr(hls_data, 'video_url'):
-                            hls_url = hls_data.video_url
-                        if hasattr(hls_data, 'thumbnail_urls') and hls_data.thumbnail_urls:
-                            thumbnail_url = hls_data.thumbnail_urls[0]
-                        if hasattr(hls_data, 'status'):
-                            hls_status = hls_data.status
-                            
-                # If no HLS URL yet, try dictionary conversion
-                if not hls_url:
-                    try:
-                        # Convert to dict if possible
-                        if hasattr(video_details, 'dict'):
-                            video_dict = video_details.dict()
-                        elif hasattr(video_details, '__dict__'):
-                            video_dict = video_details.__dict__
-                        else:
-                            video_dict = dict(video_details)
-                        
-                        if 'hls' in video_dict and video_dict['hls']:
-                            hls_data = video_dict['hls']
-                            hls_url = hls_data.get('video_url')
-                            thumbnail_urls = hls_data.get('thumbnail_urls', [])
-                            thumbnail_url = thumbnail_urls[0] if thumbnail_urls else None
-                            hls_status = hls_data.get('status')
-                    except Exception as e:
-                        logger.warning(f"Could not convert to dict: {e}")
+                hls_url, thumbnail_urls, hls_status = await _get_hls(index_id, twelvelabs_video_id)
+                thumbnail_url = thumbnail_urls[0] if thumbnail_urls else None
                 
                 # Log what we found
                 logger.info(f"✅ HLS URL found: {bool(hls_url)}")
@@ -2876,16 +3318,14 @@ async def get_video_info(video_id: int):
         logger.error(f"❌ Video info error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+HLS_DEBUG_FIELDS = ("video_url", "thumbnail_urls", "status", "updated_at")
+_HLS_DEBUG_GET = attrgetter(*HLS_DEBUG_FIELDS)
+
 @app.get("/api/videos/{video_id}/hls-debug")
-async def debug_hls(video_id: int):
-    """Debug endpoint to check HLS availability and status"""
+async def debug_hls(video_id: int, verbose: bool = False):
+    """Debug endpoint to check HLS availability and status (?verbose=1 adds the attribute listing)"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT video_path, twelvelabs_video_id, index_id FROM videos WHERE id = ?", (video_id,))
-        video = cursor.fetchone()
-        conn.close()
+        video = await get_video_row(video_id)
         
         if not video:
             return {"error": "Video not found in database"}
@@ -2903,11 +3343,12 @@ async def debug_hls(video_id: int):
         }
         
         if twelvelabs_video_id and index_id:
-            client = TwelveLabs(api_key=TWELVELABS_API_KEY)
+            client = _tl_client(TWELVELABS_API_KEY)
             
             try:
                 # Get full video details
-                video_details = client.indexes.videos.retrieve(
+                video_details = await asyncio.to_thread(
+                    client.indexes.videos.retrieve,
                     index_id=index_id,
                     video_id=twelvelabs_video_id
                 )
@@ -2922,12 +3363,11 @@ async def debug_hls(video_id: int):
                     debug_info["hls_type"] = str(type(hls_obj))
                     
                     if hls_obj:
-                        debug_info["hls_data"] = {
-                            "video_url": getattr(hls_obj, 'video_url', None),
-                            "thumbnail_urls": getattr(hls_obj, 'thumbnail_urls', None),
-                            "status": getattr(hls_obj, 'status', None),
-                            "updated_at": getattr(hls_obj, 'updated_at', None)
-                        }
+                        try:
+                            hls_values = _HLS_DEBUG_GET(hls_obj)
+                        except AttributeError:
+                            hls_values = tuple(getattr(hls_obj, field, None) for field in HLS_DEBUG_FIELDS)
+                        debug_info["hls_data"] = dict(zip(HLS_DEBUG_FIELDS, hls_values))
                 else:
                     debug_info["has_hls_attr"] = False
                 
@@ -2947,8 +3387,9 @@ async def debug_hls(video_id: int):
                 except Exception as e:
                     debug_info["dict_error"] = str(e)
                 
-                # Method 3: Raw response inspection
-                debug_info["available_attrs"] = dir(video_details)[:20]  # First 20 attributes
+                # Method 3: Raw response inspection (dir() builds and sorts every attribute name)
+                if verbose:
+                    debug_info["available_attrs"] = dir(video_details)[:20]  # First 20 attributes
                 
             except Exception as e:
                 debug_info["api_error"] = str(e)
@@ -2962,27 +3403,23 @@ async def debug_hls(video_id: int):
 async def debug_twelve(video_id: int):
     """Debug endpoint to see raw TwelveLabs response"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT twelvelabs_video_id, index_id FROM videos WHERE id = ?", (video_id,))
-        video = cursor.fetchone()
-        conn.close()
+        video = await get_video_row(video_id)
         
         if not video:
             raise HTTPException(status_code=404, detail="Video not found")
         
-        twelvelabs_video_id = video[0]
-        index_id = video[1]
+        twelvelabs_video_id = video[1]
+        index_id = video[2]
         
         if not twelvelabs_video_id or not index_id:
             raise HTTPException(status_code=404, detail="Video not available in TwelveLabs")
         
         logger.info(f"🔍 Debug: Fetching raw TwelveLabs response for video {video_id}")
-        client = TwelveLabs(api_key=TWELVELABS_API_KEY)
+        client = _tl_client(TWELVELABS_API_KEY)
         
         # Get video details from TwelveLabs
-        video_details = client.indexes.videos.retrieve(
+        video_details = await asyncio.to_thread(
+            client.indexes.videos.retrieve,
             index_id=index_id,
             video_id=twelvelabs_video_id
         )
@@ -3005,122 +3442,84 @@ async def debug_twelve(video_id: int):
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Debug error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _resolve_hls(index_id: str, twelvelabs_video_id: str) -> Dict[str, Any]:
+    """Shared hot path of the stream endpoints - cached, single-flight lookup; 404 when no stream"""
+    logger.info(f"📡 Fetching HLS stream from TwelveLabs: index={index_id}, video={twelvelabs_video_id}")
+    hls_url, thumbnail_urls, hls_status = await _get_hls(index_id, twelvelabs_video_id)
+    
+    if not hls_url:
+        # Upstream answered without a usable stream; raw response inspection lives in /hls-debug and /debug-twelve
+        logger.error(f"❌ Could not find HLS URL in TwelveLabs response for video {twelvelabs_video_id}")
+        raise HTTPException(status_code=404, detail="HLS stream URL not available in TwelveLabs response")
+    
+    logger.info(f"✅ HLS stream URL: {hls_url} (status={hls_status}, {len(thumbnail_urls)} thumbnails)")
+    
+    return {"hls_url": hls_url, "thumbnail_urls": thumbnail_urls, "hls_status": hls_status}
+
+STREAM_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=30"
+
+def _stream_response(payload: Dict[str, Any], if_none_match: Optional[str]):
+    """Wrap a stream payload with an ETag, answering 304 when the client already has it"""
+    data = payload["data"]
+    etag_source = f"{data['twelvelabs_video_id']}|{data['hls_status']}|{data['hls_url']}"
+    etag = f'W/"{hashlib.md5(etag_source.encode()).hexdigest()}"'
+    # Only finished streams are stable enough for shared caches
+    headers = {
+        "ETag": etag,
+        "Cache-Control": STREAM_CACHE_CONTROL if data["hls_status"] == 'COMPLETE' else "no-cache"
+    }
+    if if_none_match and (if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(","))):
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(content=payload, headers=headers)
+
 @app.get("/api/videos/{video_id}/stream")
-async def stream_video(video_id: int):
+async def stream_video(video_id: int, if_none_match: Optional[str] = Header(None)):
     """Get HLS stream URL from TwelveLabs for videos uploaded there (by database ID)"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT twelvelabs_video_id, index_id FROM videos WHERE id = ?", (video_id,))
-        video = cursor.fetchone()
-        conn.close()
+        video = await get_video_row(video_id)
         
         if not video:
             raise HTTPException(status_code=404, detail="Video not found")
         
-        twelvelabs_video_id = video[0]
-        index_id = video[1]
+        twelvelabs_video_id = video[1]
+        index_id = video[2]
         
         if not twelvelabs_video_id or not index_id:
             raise HTTPException(status_code=404, detail="Video not available in TwelveLabs")
         
-        logger.info(f"📡 Fetching HLS stream from TwelveLabs: index={index_id}, video={twelvelabs_video_id}")
-        client = TwelveLabs(api_key=TWELVELABS_API_KEY)
-        
-        # Get video details from TwelveLabs using the correct API structure
-        video_details = client.indexes.videos.retrieve(
-            index_id=index_id,
-            video_id=twelvelabs_video_id
-        )
-        
-        # Extract HLS URL from the response - try multiple approaches
-        hls_url = None
-        thumbnail_urls = []
-        hls_status = None
-        
-        # Method 1: Direct object access
-        if hasattr(video_details, 'hls') and video_details.hls:
-            if hasattr(video_details.hls, 'video_url'):
-                hls_url = video_details.hls.video_url
-                logger.info(f"✅ Found HLS URL via object access: {hls_url}")
-            
-            # Also get thumbnail URLs and status
-            if hasattr(video_details.hls, 'thumbnail_urls') and video_details.hls.thumbnail_urls:
-                thumbnail_urls = video_details.hls.thumbnail_urls
-            if hasattr(video_details.hls, 'status'):
-                hls_status = video_details.hls.status
-        
-        # Method 2: Dict conversion if object access failed
-        if not hls_url:
-            try:
-                video_dict = video_details.dict() if hasattr(video_details, 'dict') else {}
-                logger.info(f"📊 Video dict keys: {list(video_dict.keys())}")
-                
-                if 'hls' in video_dict and isinstance(video_dict['hls'], dict):
-                    hls_data = video_dict['hls']
-                    logger.info(f"📊 HLS dict keys: {list(hls_data.keys())}")
-                    
-                    hls_url = hls_data.get('video_url')
-                    if hls_url:
-                        logger.info(f"✅ Found HLS URL via dict access: {hls_url}")
-                    
-                    # Get thumbnail URLs and status from dict
-                    if 'thumbnail_urls' in hls_data and hls_data['thumbnail_urls']:
-                        thumbnail_urls = hls_data['thumbnail_urls']
-                    if 'status' in hls_data:
-                        hls_status = hls_data['status']
-                        
-            except Exception as dict_error:
-                logger.warning(f"Could not parse video dict: {dict_error}")
-        
-        # Method 3: Raw response inspection
-        if not hls_url:
-            try:
-                # Log the raw response structure for debugging
-                logger.info(f"📊 Video details type: {type(video_details)}")
-                logger.info(f"📊 Video details attributes: {[attr for attr in dir(video_details) if not attr.startswith('_')]}")
-                
-                # Try to access as raw dict
-                if hasattr(video_details, '__dict__'):
-                    raw_dict = video_details.__dict__
-                    logger.info(f"📊 Raw dict keys: {list(raw_dict.keys())}")
-                    
-                    if 'hls' in raw_dict and raw_dict['hls']:
-                        hls_obj = raw_dict['hls']
-                        if hasattr(hls_obj, 'video_url'):
-                            hls_url = hls_obj.video_url
-                        elif isinstance(hls_obj, dict) and 'video_url' in hls_obj:
-                            hls_url = hls_obj['video_url']
-                            
-            except Exception as raw_error:
-                logger.warning(f"Could not access raw response: {raw_error}")
-        
-        if not hls_url:
-            logger.error(f"❌ Could not find HLS URL in TwelveLabs response")
-            logger.error(f"📊 Full response structure: {video_details}")
-            raise HTTPException(status_code=404, detail="HLS stream URL not available in TwelveLabs response")
-        
-        logger.info(f"✅ Successfully extracted HLS stream URL: {hls_url}")
-        logger.info(f"📊 Thumbnail URLs: {thumbnail_urls}")
-        logger.info(f"📊 HLS Status: {hls_status}")
-        
-        return {
+        # Finished streams are persisted on the row, so they are served without calling TwelveLabs
+        if video[4] == 'COMPLETE' and video[3]:
+            hls = {
+                "hls_url": video[3],
+                "thumbnail_urls": json.loads(video[5]) if video[5] else [],
+                "hls_status": video[4]
+            }
+        else:
+            hls = await _resolve_hls(index_id, twelvelabs_video_id)
+            if hls["hls_status"] == 'COMPLETE':
+                await _execute("""
+                    UPDATE videos SET hls_url = ?, hls_status = ?, hls_thumbnail_urls = ?, hls_cached_at = ?
+                    WHERE id = ? AND twelvelabs_video_id = ?
+                """, (hls["hls_url"], hls["hls_status"], json.dumps(hls["thumbnail_urls"]), int(time.time()),
+                      video_id, twelvelabs_video_id))
+                invalidate_video_row(video_id)
+        
+        return _stream_response({
             "success": True,
             "data": {
                 "video_id": video_id,
-                "hls_url": hls_url,
-                "thumbnail_urls": thumbnail_urls,
-                "hls_status": hls_status,
+                **hls,
                 "source": "twelvelabs",
                 "twelvelabs_video_id": twelvelabs_video_id,
                 "index_id": index_id
             }
-        }
+        }, if_none_match)
         
     except HTTPException:
         raise
@@ -3129,134 +3528,141 @@ async def stream_video(video_id: int):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/twelve/{twelvelabs_video_id}/stream")
-async def stream_twelve_video(twelvelabs_video_id: str, index_id: str = None):
+async def stream_twelve_video(twelvelabs_video_id: str, index_id: str = None,
+                              if_none_match: Optional[str] = Header(None)):
     """Get HLS stream URL directly from TwelveLabs video ID (for frontend use)"""
     try:
         # Use provided index_id or default test index
         target_index_id = index_id or DEFAULT_INDEX_ID
         
-        logger.info(f"📡 Fetching HLS stream directly from TwelveLabs: index={target_index_id}, video={twelvelabs_video_id}")
-        client = TwelveLabs(api_key=TWELVELABS_API_KEY)
+        return _stream_response({
+            "success": True,
+            "data": {
+                "twelvelabs_video_id": twelvelabs_video_id,
+                **await _resolve_hls(target_index_id, twelvelabs_video_id),
+                "source": "twelvelabs",
+                "index_id": target_index_id
+            }
+        }, if_none_match)
         
-        # Get video details from TwelveLabs using the correct API structure
-        video_details = client.indexes.videos.retrieve(
-            index_id=target_index_id,
-            video_id=twelvelabs_video_id
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Stream twelve video error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _apply_batch_hls(entry: dict, result) -> dict:
+    """Fill a batch-stream entry from a _get_hls result or the exception it raised"""
+    if isinstance(result, Exception):
+        logger.warning(f"⚠️ Batch stream lookup failed for video {entry['video_id']}: {result}")
+        entry["error"] = str(result)
+        return entry
+    hls_url, thumbnail_urls, hls_status = result
+    entry.update({
+        "hls_url": hls_url,
+        "thumbnail_urls": thumbnail_urls,
+        "hls_status": hls_status
+    })
+    if not hls_url:
+        entry["error"] = "HLS stream URL not available in TwelveLabs response"
+    return entry
+
+@app.post("/api/videos/batch-stream")
+async def batch_stream_videos(
+    request: BatchStreamRequest,
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson)$")
+):
+    """Get HLS stream URLs for up to 50 videos in one call (one DB query, parallel TwelveLabs lookups).
+    With ?format=ndjson each video is streamed as soon as its lookup finishes, and ids
+    with no stored video get a {"video_id", "error"} line."""
+    try:
+        video_ids = list(dict.fromkeys(request.video_ids))
+        placeholders = ", ".join("?" * len(video_ids))
+        rows = await _fetchall(
+            f"SELECT id, twelvelabs_video_id, index_id FROM videos WHERE id IN ({placeholders})",
+            tuple(video_ids)
         )
         
-        # Extract HLS URL from the response - try multiple approaches
-        hls_url = None
-        thumbnail_urls = []
-        hls_status = None
-        
-        # Method 1: Direct object access
-        if hasattr(video_details, 'hls') and video_details.hls:
-            if hasattr(video_details.hls, 'video_url'):
-                hls_url = video_details.hls.video_url
-                logger.info(f"✅ Found HLS URL via object access: {hls_url}")
-            
-            # Also get thumbnail URLs and status
-            if hasattr(video_details.hls, 'thumbnail_urls') and video_details.hls.thumbnail_urls:
-                thumbnail_urls = video_details.hls.thumbnail_urls
-            if hasattr(video_details.hls, 'status'):
-                hls_status = video_details.hls.status
-        
-        # Method 2: Dict conversion if object access failed
-        if not hls_url:
-            try:
-                video_dict = video_details.dict() if hasattr(video_details, 'dict') else {}
-                logger.info(f"📊 Video dict keys: {list(video_dict.keys())}")
-                
-                if 'hls' in video_dict and isinstance(video_dict['hls'], dict):
-                    hls_data = video_dict['hls']
-                    logger.info(f"📊 HLS dict keys: {list(hls_data.keys())}")
-                    
-                    hls_url = hls_data.get('video_url')
-                    if hls_url:
-                        logger.info(f"✅ Found HLS URL via dict access: {hls_url}")
-                    
-                    # Get thumbnail URLs and status from dict
-                    if 'thumbnail_urls' in hls_data and hls_data['thumbnail_urls']:
-                        thumbnail_urls = hls_data['thumbnail_urls']
-                    if 'status' in hls_data:
-                        hls_status = hls_data['status']
-                        
-            except Exception as dict_error:
-                logger.warning(f"Could not parse video dict: {dict_error}")
+        videos = {}
+        lookups = []
+        for video_id, twelvelabs_video_id, index_id in rows:
+            videos[video_id] = {
+                "video_id": video_id,
+                "twelvelabs_video_id": twelvelabs_video_id,
+                "index_id": index_id,
+                "source": "twelvelabs"
+            }
+            if twelvelabs_video_id and index_id:
+                lookups.append(video_id)
+            else:
+                videos[video_id]["error"] = "Video not available in TwelveLabs"
         
-        # Method 3: Raw response inspection
-        if not hls_url:
-            try:
-                # Log the raw response structure for debugging
-                logger.info(f"📊 Video details type: {type(video_details)}")
-                logger.info(f"📊 Video details attributes: {[attr for attr in dir(video_details) if not attr.startswith('_')]}")
-                
-                # Try to access as raw dict
-                if hasattr(video_details, '__dict__'):
-                    raw_dict = video_details.__dict__
-                    logger.info(f"📊 Raw dict keys: {list(raw_dict.keys())}")
-                    
-                    if 'hls' in raw_dict and raw_dict['hls']:
-                        hls_obj = raw_dict['hls']
-                        if hasattr(hls_obj, 'video_url'):
-                            hls_url = hls_obj.video_url
-                        elif isinstance(hls_obj, dict) and 'video_url' in hls_obj:
-                            hls_url = hls_obj['video_url']
-                            
-            except Exception as raw_error:
-                logger.warning(f"Could not access raw response: {raw_error}")
-        
-        if not hls_url:
-            logger.error(f"❌ Could not find HLS URL in TwelveLabs response")
-            logger.error(f"📊 Full response structure: {video_details}")
-            raise HTTPException(status_code=404, detail="HLS stream URL not available in TwelveLabs response")
-        
-        logger.info(f"✅ Successfully extracted HLS stream URL: {hls_url}")
-        logger.info(f"📊 Thumbnail URLs: {thumbnail_urls}")
-        logger.info(f"📊 HLS Status: {hls_status}")
+        if response_format == "ndjson":
+            async def lookup(vid):
+                try:
+                    return vid, await _get_hls(videos[vid]["index_id"], videos[vid]["twelvelabs_video_id"])
+                except Exception as e:
+                    return vid, e
+            
+            async def generate():
+                # Unknown ids and entries needing no lookup go out first, the rest in completion order
+                for vid in video_ids:
+                    if vid not in videos:
+                        yield orjson.dumps({"video_id": vid, "error": "Video not found"}) + b"\n"
+                pending = set(lookups)
+                for vid, entry in videos.items():
+                    if vid not in pending:
+                        yield orjson.dumps(entry) + b"\n"
+                for next_done in asyncio.as_completed([lookup(vid) for vid in lookups]):
+                    vid, result = await next_done
+                    yield orjson.dumps(_apply_batch_hls(videos[vid], result)) + b"\n"
+            
+            return StreamingResponse(generate(), media_type="application/x-ndjson")
+        
+        results = await asyncio.gather(
+            *[_get_hls(videos[vid]["index_id"], videos[vid]["twelvelabs_video_id"]) for vid in lookups],
+            return_exceptions=True
+        )
+        for vid, result in zip(lookups, results):
+            _apply_batch_hls(videos[vid], result)
         
         return {
             "success": True,
             "data": {
-                "twelvelabs_video_id": twelvelabs_video_id,
-                "hls_url": hls_url,
-                "thumbnail_urls": thumbnail_urls,
-                "hls_status": hls_status,
-                "source": "twelvelabs",
-                "index_id": target_index_id
+                "videos": videos,
+                "found": len(videos),
+                "missing": len(video_ids) - len(videos)
             }
         }
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Stream twelve video error: {str(e)}")
+        logger.error(f"❌ Batch stream error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/videos/{video_id}/download")
 async def download_video(video_id: int):
     """Download a generated video file"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT video_path FROM videos WHERE id = ?", (video_id,))
-        video = cursor.fetchone()
+        video = await get_video_row(video_id)
         
         if not video:
             logger.error(f"❌ Video not found in database: {video_id}")
             raise HTTPException(status_code=404, detail="Video not found")
         
         video_path = video[0]
-        conn.close()
         
         logger.info(f"📥 Video download request: {video_id}, path: {video_path}")
         
         if not video_path:
             logger.error(f"❌ Video path is empty for video {video_id}")
             raise HTTPException(status_code=404, detail="Video path not found")
-            
-        if not os.path.exists(video_path):
+        
+        # Stat once and hand the result to FileResponse so it doesn't stat again
+        try:
+            stat_result = os.stat(video_path)
+        except FileNotFoundError:
             logger.error(f"❌ Video file does not exist: {video_path}")
             raise HTTPException(status_code=404, detail=f"Video file not found at {video_path}")
         
@@ -3265,9 +3671,12 @@ async def download_video(video_id: int):
         return FileResponse(
             path=video_path,
             media_type="video/mp4",
-            filename=filename
+            filename=filename,
+            stat_result=stat_result
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Video download error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -6,48 +6,60 @@ This script should be run periodically to clean up temporary files.
 
 import os
 import time
-import glob
+import logging
 from datetime import datetime, timedelta
 
+logger = logging.getLogger(__name__)
+
 def cleanup_old_uploads(days_old=7):
     """Remove video files older than specified days from uploads folder"""
     uploads_dir = "uploads"
     
     if not os.path.exists(uploads_dir):
-        print("Uploads directory doesn't exist")
-        return
-    
-    # Get all video files
-    video_files = glob.glob(os.path.join(uploads_dir, "*.mp4"))
-    
-    if not video_files:
-        print("No video files found in uploads directory")
+        logger.info("Uploads directory doesn't exist")
         return
     
     cutoff_time = time.time() - (days_old * 24 * 60 * 60)
-    removed_count = 0
+    video_count = 0
+    removed = []  # (name, size) - reported in one summary instead of a write per file
     total_size = 0
     
-    for file_path in video_files:
-        try:
-            file_stat = os.stat(file_path)
-            file_age = time.time() - file_stat.st_mtime
-            
-            if file_age > (days_old * 24 * 60 * 60):
-                file_size = file_stat.st_size
-                total_size += file_size
+    # Open the directory once so unlinks resolve names relative to it
+    dir_fd = os.open(uploads_dir, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        # Single directory pass - DirEntry caches type info from readdir
+        with os.scandir(dir_fd) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".mp4") or not entry.is_file(follow_symlinks=False):
+                    continue
+                video_count += 1
                 
-                os.remove(file_path)
-                removed_count += 1
-                print(f"Removed: {os.path.basename(file_path)} ({file_size / 1024 / 1024:.1f} MB)")
-                
-        except Exception as e:
-            print(f"Error removing {file_path}: {e}")
+                try:
+                    file_stat = entry.stat(follow_symlinks=False)
+                    
+                    if file_stat.st_mtime < cutoff_time:
+                        os.unlink(entry.name, dir_fd=dir_fd)
+                        removed.append((entry.name, file_stat.st_size))
+                        total_size += file_stat.st_size
+                        
+                except Exception as e:
+                    logger.error(f"Error removing {os.path.join(uploads_dir, entry.name)}: {e}")
+    finally:
+        os.close(dir_fd)
+    
+    if not video_count:
+        logger.info("No video files found in uploads directory")
+        return
     
-    print(f"\nCleanup complete:")
-    print(f"- Removed {removed_count} files")
-    print(f"- Freed up {total_size / 1024 / 1024:.1f} MB")
-    print(f"- Files older than {days_old} days were removed")
+    summary = [f"Removed: {name} ({size / 1024 / 1024:.1f} MB)" for name, size in removed]
+    summary += [
+        "\nCleanup complete:",
+        f"- Removed {len(removed)} files",
+        f"- Freed up {total_size / 1024 / 1024:.1f} MB",
+        f"- Files older than {days_old} days were removed",
+    ]
+    logger.info("\n".join(summary))
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     cleanup_old_uploads(days_old=3)  # Remove files older than 3 days
@@ -0,0 +1,91 @@
+"""
+Shared SQLite connection pool for the backend.
+Connections are opened once in WAL mode and reused across requests.
+"""
+
+import sqlite3
+import queue
+import threading
+from contextlib import contextmanager
+
+# Database setup
+DB_PATH = "recurser_validator.db"
+DB_POOL_SIZE = 5  # connections kept open between requests
+DB_POOL_MAX_OVERFLOW = 10  # extra short-lived connections allowed under bursts
+DB_BUSY_TIMEOUT = 30  # seconds to wait on a locked database or an exhausted pool
+
+class SQLitePool:
+    """Small process-wide pool of reusable SQLite connections"""
+    
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA cache_size=-20000",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA mmap_size=268435456",  # 256MB memory-mapped reads
+    )
+    
+    def __init__(self, path: str, size: int = DB_POOL_SIZE, max_overflow: int = DB_POOL_MAX_OVERFLOW,
+                 timeout: float = DB_BUSY_TIMEOUT):
+        self.path = path
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self._idle = queue.Queue(maxsize=size)
+        self._created = 0
+        self._lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=self.timeout)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_create = self._created < self.size + self.max_overflow
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        # Pool and overflow exhausted - wait for a connection to be returned
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(f"Timed out after {self.timeout}s waiting for a database connection")
+    
+    def _release(self, conn: sqlite3.Connection):
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            # Overflow connection - close it instead of keeping it around
+            conn.close()
+            with self._lock:
+                self._created -= 1
+    
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; uncommitted work is rolled back on error"""
+        conn = self._acquire()
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._release(conn)
+
+db_pool = SQLitePool(DB_PATH)
+
+def db_conn():
+    """Borrow a pooled connection: `with db_conn() as conn:`"""
+    return db_pool.connection()